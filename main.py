@@ -8,6 +8,7 @@ import pandas as pd
 from pathlib import Path
 import argparse
 import shutil
+from concurrent.futures import ProcessPoolExecutor
 
 
 from src import common, colors, human_origins, metadata, consensus_species, \
@@ -151,6 +152,10 @@ def main():
     # Add an argument to see if we should clean up target directories before running.
     parser.add_argument('--clean', action='store_true', help='Clean up target directories before running', default=False)
 
+    # Number of sections (primates, birds, etc.) to run at once, each in its own
+    # process. The default of one runs them one after another.
+    parser.add_argument('--jobs', type=int, help='Number of sections to process in parallel', default=1)
+
 
     # Check to see if the user has passed in any command line parameters.
     args = parser.parse_args()
@@ -208,166 +213,243 @@ def main():
     # -----------------------------------------------------------------------------------
     vocab = vocabulary(datainfo)
 
-    #"""
+    # The sections to run, in order. Each one writes into its own datainfo['dir']
+    # tree and only reads the datainfo entries it sets itself, so they don't depend
+    # on one another.
+    sections = [
+        ('human_origins', process_human_origins),
+        ('primates', process_primates),
+        ('birds', process_birds),
+        ('insects', process_insects),
+        ('splattergram', process_splattergram),
+    ]
+    sections = [(name, func) for name, func in sections if name not in args.skip]
+
+    if (args.jobs > 1) and (len(sections) > 1):
+        # Run the sections side by side, one process each, and each with its own copy
+        # of datainfo. The worker processes don't see the command line, so hand them
+        # the create-dirs setting. Output to the screen will be interleaved.
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(sections)), initializer=init_worker, initargs=(args.create_dirs,)) as executor:
+            futures = [executor.submit(func, dict(datainfo), vocab) for name, func in sections]
+
+            # Wait on each section so any exception is raised here
+            for future in futures:
+                future.result()
+    else:
+        for name, func in sections:
+            func(datainfo, vocab)
+
+
+
+
+def init_worker(create_dirs):
+    """
+    Set up a worker process for running a section in parallel.
+
+    :param create_dirs: Whether or not to create directories by default.
+    :type create_dirs: bool
+    """
+
+    common.CREATE_DIRS_BY_DEFAULT = create_dirs
+
+
+
+def process_human_origins(datainfo, vocab):
+    """
+    Set up and run each of the human origins data sets.
+
+    :param datainfo: Metadata about the dataset.
+    :type datainfo: dict of {str : list}
+    :param vocab: A taxon to common name DataFrame.
+    :type vocab: DataFrame
+    """
+
     # Human origin / population DNA data
     # -----------------------------------------------------------------------------------
-    if ("human_origins" not in args.skip):
-        datainfo['sub_project'] = 'Human Origins'
-        datainfo['version'] = '1'
+    datainfo['sub_project'] = 'Human Origins'
+    datainfo['version'] = '1'
 
-        datainfo['dir'] = datainfo['sub_project'].replace(' ', '_').lower()
-        datainfo['catalog_directory'] = 'Version_1__2022_05_22'
-        datainfo['sequence_file'] = 'patterson2012_humanPopulations_allSNPs.mMDS.noOutliers.xyz.reProjected.csv'
+    datainfo['dir'] = datainfo['sub_project'].replace(' ', '_').lower()
+    datainfo['catalog_directory'] = 'Version_1__2022_05_22'
+    datainfo['sequence_file'] = 'patterson2012_humanPopulations_allSNPs.mMDS.noOutliers.xyz.reProjected.csv'
 
 
-        origins(datainfo)
-    
+    origins(datainfo)
+
 
 
+def process_primates(datainfo, vocab):
+    """
+    Set up and run each of the primates data sets.
+
+    :param datainfo: Metadata about the dataset.
+    :type datainfo: dict of {str : list}
+    :param vocab: A taxon to common name DataFrame.
+    :type vocab: DataFrame
+    """
 
     # Primates
     # ------------------------------------------------------------------------
-    if ('primates' not in args.skip):
-        datainfo['dir'] = 'primates'
-        datainfo['sub_project'] = 'Primates'
+    datainfo['dir'] = 'primates'
+    datainfo['sub_project'] = 'Primates'
 
-        datainfo['version'] = '1'
-        datainfo['catalog_directory'] = 'MDS_v1'
-        datainfo['metadata_file'] = 'primates.taxons.metadata.csv'
-        datainfo['consensus_file'] = 'primates.cleaned.species.MDS.euclidean.csv'
-        datainfo['sequence_file'] = 'primates.cleaned.seq_speciesRef.gowerIntepolatedMDS.euclidean.csv'
-        datainfo['seq2taxon_file'] = 'primates.seqId2taxon.csv'
-        datainfo['synonomous_file'] = 'primates.syn.nonsyn.distToHumanConsensus.csv'
-        datainfo['lineage_columns'] = [24, 31]
+    datainfo['version'] = '1'
+    datainfo['catalog_directory'] = 'MDS_v1'
+    datainfo['metadata_file'] = 'primates.taxons.metadata.csv'
+    datainfo['consensus_file'] = 'primates.cleaned.species.MDS.euclidean.csv'
+    datainfo['sequence_file'] = 'primates.cleaned.seq_speciesRef.gowerIntepolatedMDS.euclidean.csv'
+    datainfo['seq2taxon_file'] = 'primates.seqId2taxon.csv'
+    datainfo['synonomous_file'] = 'primates.syn.nonsyn.distToHumanConsensus.csv'
+    datainfo['lineage_columns'] = [24, 31]
 
-        datainfo['tree_dir'] = 'tree'
-        datainfo['tree_type'] = 'tabletop'
-        datainfo['newick_file'] = 'Primates.curated.timetree.withInternalName.nwk'
-        datainfo['coordinates_file'] = 'primates_species.xy.csv'
+    datainfo['tree_dir'] = 'tree'
+    datainfo['tree_type'] = 'tabletop'
+    datainfo['newick_file'] = 'Primates.curated.timetree.withInternalName.nwk'
+    datainfo['coordinates_file'] = 'primates_species.xy.csv'
 
-        datainfo['transform_tree_z'] = 0.0 # 133.5
-        datainfo['scale_tree_z'] = 75.0
+    datainfo['transform_tree_z'] = 0.0 # 133.5
+    datainfo['scale_tree_z'] = 75.0
 
-        primates(datainfo, vocab, do_tree=True)
+    primates(datainfo, vocab, do_tree=True)
 
 
-        datainfo['version'] = '1'
-        datainfo['catalog_directory'] = 'UMAP_v1'
-        datainfo['metadata_file'] = 'primates.taxons.metadata.csv'
-        datainfo['consensus_file'] = 'pumap_taxon.csv'
-        datainfo['sequence_file'] = 'pumap_taxon_allpoints.csv'
-        datainfo['seq2taxon_file'] = 'primates.seqId2taxon.csv'
-        datainfo['synonomous_file'] = 'primates.syn.nonsyn.distToHumanConsensus.csv'
-        datainfo['lineage_columns'] = [24, 31]
+    datainfo['version'] = '1'
+    datainfo['catalog_directory'] = 'UMAP_v1'
+    datainfo['metadata_file'] = 'primates.taxons.metadata.csv'
+    datainfo['consensus_file'] = 'pumap_taxon.csv'
+    datainfo['sequence_file'] = 'pumap_taxon_allpoints.csv'
+    datainfo['seq2taxon_file'] = 'primates.seqId2taxon.csv'
+    datainfo['synonomous_file'] = 'primates.syn.nonsyn.distToHumanConsensus.csv'
+    datainfo['lineage_columns'] = [24, 31]
+
+    # Preprocess the consensus file to get the right format
+    new_consensus_filename = common.pre_process_takanori_consensus(datainfo)
+    datainfo['consensus_file'] = new_consensus_filename
+
+    # Process the sequence data file to fet the right format
+    new_seq_filename = common.pre_process_takanori_seq(datainfo)
+    datainfo['sequence_file'] = new_seq_filename
+
+    primates(datainfo, vocab, do_tree = False)
 
-        # Preprocess the consensus file to get the right format
-        new_consensus_filename = common.pre_process_takanori_consensus(datainfo)
-        datainfo['consensus_file'] = new_consensus_filename
 
-        # Process the sequence data file to fet the right format
-        new_seq_filename = common.pre_process_takanori_seq(datainfo)
-        datainfo['sequence_file'] = new_seq_filename
 
-        primates(datainfo, vocab, do_tree = False)
+def process_birds(datainfo, vocab):
+    """
+    Set up and run each of the bird data sets.
 
+    :param datainfo: Metadata about the dataset.
+    :type datainfo: dict of {str : list}
+    :param vocab: A taxon to common name DataFrame.
+    :type vocab: DataFrame
+    """
 
     # Birds
     # ------------------------------------------------------------------------
-    if ('birds' not in args.skip):
-        datainfo['dir'] = 'birds'
-        datainfo['sub_project'] = 'Birds'
-
-        datainfo['version'] = '1'
-        datainfo['catalog_directory'] = 'MDS_v1'
-        datainfo['metadata_file'] = 'aves.taxons.metadata.csv'
-        datainfo['consensus_file'] = 'aves.cleaned.species.MDS.euclidean.primates_scale.csv'
-        datainfo['sequence_file'] = 'aves.cleaned.seq_speciesRef.gowerIntepolatedMDS.euclidean.primates_scale.csv'
-        datainfo['seq2taxon_file'] = 'aves.seqId2taxon.csv'
-        datainfo['synonomous_file'] = None
-        datainfo['lineage_columns'] = [27, 34]
-        birds(datainfo, vocab)
-
-        datainfo['version'] = '1'
-        datainfo['catalog_directory'] = 'UMAP_v1'
-        datainfo['metadata_file'] = 'aves.taxons.metadata.csv'
-        datainfo['consensus_file'] = 'aves.cleaned.species.PUMAP.euclidean.primates_scale_ver1.csv'
-        datainfo['sequence_file'] = 'aves.cleaned.seq_speciesRef.PUMAP.euclidean.primates_scale_ver1.csv'
-        datainfo['seq2taxon_file'] = 'aves.seqId2taxon.csv'
-        datainfo['synonomous_file'] = None
-        datainfo['lineage_columns'] = [27, 34]
-        birds(datainfo, vocab)
-
-        datainfo['version'] = '2'
-        datainfo['catalog_directory'] = 'UMAP_v2'
-        datainfo['metadata_file'] = 'aves.taxons.metadata.csv'
-        datainfo['consensus_file'] = 'aves.cleaned.species.PUMAP.euclidean.primates_scale_ver2.csv'
-        datainfo['sequence_file'] = 'aves.cleaned.seq_speciesRef.PUMAP.euclidean.primates_scale_ver2.csv'
-        datainfo['seq2taxon_file'] = 'aves.seqId2taxon.csv'
-        datainfo['synonomous_file'] = None
-        datainfo['lineage_columns'] = [27, 34]
-        birds(datainfo, vocab)
-
-        datainfo['version'] = '1'
-        datainfo['catalog_directory'] = 'birds_all'
-        datainfo['metadata_file'] = 'birds_all.taxons.metadata.csv'
-        datainfo['consensus_file'] = 'birds_all.species.3DcMDS.csv'
-        datainfo['sequence_file'] = 'birds_all.sequence.3DcMDS.csv'
-        datainfo['seq2taxon_file'] = 'birds_all.seqId2taxon.csv'
-        datainfo['synonomous_file'] = None
-        datainfo['lineage_columns'] = [27, 34]
-        birds(datainfo, vocab)
-
-        # The next three datasets are from the 202308 bird dataset. This dataset has 
-        # tree data, but no consensus data.
-        datainfo['version'] = '1'
-        datainfo['catalog_directory'] = '202308_bird_dataset_mMDS.xy_3Dprojection'
-        datainfo['metadata_file'] = 'aves.taxons.metadata.csv'
-        datainfo['tree_dir'] = '202308_bird_dataset_mMDS.xy_3Dprojection'
-        datainfo['tree_type'] = 'tabletop'
-        datainfo['coordinates_file'] = 'aves_families.divergence_time.mMDS.xy.csv'
-        datainfo['newick_file'] = 'kimball2019_adapted_family.timetree.nwk'
-        datainfo['seq2taxon_file'] = 'aves.seqId2taxon.csv'
-        datainfo['lineage_columns'] = [27, 34]
-        datainfo['transform_tree_z'] = 0.0 # 75.0
-        datainfo['scale_tree_z'] = 1.0
-        birds(datainfo, vocab,
-              do_consensus=False, do_sequence=False, do_sequence_lineage=False, 
-              do_slice_by_clade=False, do_slice_by_lineage=False, do_slice_by_taxon=False,
-              do_tree = True)
-
-        datainfo['version'] = '1'
-        datainfo['catalog_directory'] = '202308_bird_dataset_mMDS.xyz.sphere_3Dprojection'
-        datainfo['metadata_file'] = 'aves.taxons.metadata.csv'
-        datainfo['tree_dir'] = '202308_bird_dataset_mMDS.xyz.sphere_3Dprojection'
-        datainfo['tree_type'] = '3D'
-        datainfo['coordinates_file'] = 'aves_families.divergence_time.mMDS.xyz.csv'
-        datainfo['newick_file'] = 'kimball2019_adapted_family.timetree.nwk'
-        datainfo['seq2taxon_file'] = 'aves.seqId2taxon.csv'
-        datainfo['lineage_columns'] = [27, 34]
-        datainfo['transform_tree_z'] = 0.0 #75.0
-        datainfo['scale_tree_z'] = 1.0
-        birds(datainfo, vocab,
-              do_consensus=False, do_sequence=False, do_sequence_lineage=False, 
-              do_slice_by_clade=False, do_slice_by_lineage=False, do_slice_by_taxon=False,
-              do_tree = True)
-        
-        datainfo['version'] = '1'
-        datainfo['catalog_directory'] = '202308_bird_dataset_mMDS.xyz_3Dprojection'
-        datainfo['metadata_file'] = 'aves.taxons.metadata.csv'
-        datainfo['tree_dir'] = '202308_bird_dataset_mMDS.xyz_3Dprojection'
-        datainfo['tree_type'] = 'spherical'
-        datainfo['coordinates_file'] = 'aves_families.divergence_time.mMDS.xyz.csv'
-        datainfo['newick_file'] = 'kimball2019_adapted_family.timetree.nwk'
-        datainfo['seq2taxon_file'] = 'aves.seqId2taxon.csv'
-        datainfo['lineage_columns'] = [27, 34]
-        datainfo['transform_tree_z'] = 0.0 # 75.0
-        datainfo['scale_tree_z'] = 1.0
-        birds(datainfo, vocab,
-              do_consensus=False, do_sequence=False, do_sequence_lineage=False, 
-              do_slice_by_clade=False, do_slice_by_lineage=False, do_slice_by_taxon=False,
-              do_tree = True)
-        
+    datainfo['dir'] = 'birds'
+    datainfo['sub_project'] = 'Birds'
+
+    datainfo['version'] = '1'
+    datainfo['catalog_directory'] = 'MDS_v1'
+    datainfo['metadata_file'] = 'aves.taxons.metadata.csv'
+    datainfo['consensus_file'] = 'aves.cleaned.species.MDS.euclidean.primates_scale.csv'
+    datainfo['sequence_file'] = 'aves.cleaned.seq_speciesRef.gowerIntepolatedMDS.euclidean.primates_scale.csv'
+    datainfo['seq2taxon_file'] = 'aves.seqId2taxon.csv'
+    datainfo['synonomous_file'] = None
+    datainfo['lineage_columns'] = [27, 34]
+    birds(datainfo, vocab)
+
+    datainfo['version'] = '1'
+    datainfo['catalog_directory'] = 'UMAP_v1'
+    datainfo['metadata_file'] = 'aves.taxons.metadata.csv'
+    datainfo['consensus_file'] = 'aves.cleaned.species.PUMAP.euclidean.primates_scale_ver1.csv'
+    datainfo['sequence_file'] = 'aves.cleaned.seq_speciesRef.PUMAP.euclidean.primates_scale_ver1.csv'
+    datainfo['seq2taxon_file'] = 'aves.seqId2taxon.csv'
+    datainfo['synonomous_file'] = None
+    datainfo['lineage_columns'] = [27, 34]
+    birds(datainfo, vocab)
+
+    datainfo['version'] = '2'
+    datainfo['catalog_directory'] = 'UMAP_v2'
+    datainfo['metadata_file'] = 'aves.taxons.metadata.csv'
+    datainfo['consensus_file'] = 'aves.cleaned.species.PUMAP.euclidean.primates_scale_ver2.csv'
+    datainfo['sequence_file'] = 'aves.cleaned.seq_speciesRef.PUMAP.euclidean.primates_scale_ver2.csv'
+    datainfo['seq2taxon_file'] = 'aves.seqId2taxon.csv'
+    datainfo['synonomous_file'] = None
+    datainfo['lineage_columns'] = [27, 34]
+    birds(datainfo, vocab)
 
+    datainfo['version'] = '1'
+    datainfo['catalog_directory'] = 'birds_all'
+    datainfo['metadata_file'] = 'birds_all.taxons.metadata.csv'
+    datainfo['consensus_file'] = 'birds_all.species.3DcMDS.csv'
+    datainfo['sequence_file'] = 'birds_all.sequence.3DcMDS.csv'
+    datainfo['seq2taxon_file'] = 'birds_all.seqId2taxon.csv'
+    datainfo['synonomous_file'] = None
+    datainfo['lineage_columns'] = [27, 34]
+    birds(datainfo, vocab)
+
+    # The next three datasets are from the 202308 bird dataset. This dataset has 
+    # tree data, but no consensus data.
+    datainfo['version'] = '1'
+    datainfo['catalog_directory'] = '202308_bird_dataset_mMDS.xy_3Dprojection'
+    datainfo['metadata_file'] = 'aves.taxons.metadata.csv'
+    datainfo['tree_dir'] = '202308_bird_dataset_mMDS.xy_3Dprojection'
+    datainfo['tree_type'] = 'tabletop'
+    datainfo['coordinates_file'] = 'aves_families.divergence_time.mMDS.xy.csv'
+    datainfo['newick_file'] = 'kimball2019_adapted_family.timetree.nwk'
+    datainfo['seq2taxon_file'] = 'aves.seqId2taxon.csv'
+    datainfo['lineage_columns'] = [27, 34]
+    datainfo['transform_tree_z'] = 0.0 # 75.0
+    datainfo['scale_tree_z'] = 1.0
+    birds(datainfo, vocab,
+          do_consensus=False, do_sequence=False, do_sequence_lineage=False, 
+          do_slice_by_clade=False, do_slice_by_lineage=False, do_slice_by_taxon=False,
+          do_tree = True)
+
+    datainfo['version'] = '1'
+    datainfo['catalog_directory'] = '202308_bird_dataset_mMDS.xyz.sphere_3Dprojection'
+    datainfo['metadata_file'] = 'aves.taxons.metadata.csv'
+    datainfo['tree_dir'] = '202308_bird_dataset_mMDS.xyz.sphere_3Dprojection'
+    datainfo['tree_type'] = '3D'
+    datainfo['coordinates_file'] = 'aves_families.divergence_time.mMDS.xyz.csv'
+    datainfo['newick_file'] = 'kimball2019_adapted_family.timetree.nwk'
+    datainfo['seq2taxon_file'] = 'aves.seqId2taxon.csv'
+    datainfo['lineage_columns'] = [27, 34]
+    datainfo['transform_tree_z'] = 0.0 #75.0
+    datainfo['scale_tree_z'] = 1.0
+    birds(datainfo, vocab,
+          do_consensus=False, do_sequence=False, do_sequence_lineage=False, 
+          do_slice_by_clade=False, do_slice_by_lineage=False, do_slice_by_taxon=False,
+          do_tree = True)
+    
+    datainfo['version'] = '1'
+    datainfo['catalog_directory'] = '202308_bird_dataset_mMDS.xyz_3Dprojection'
+    datainfo['metadata_file'] = 'aves.taxons.metadata.csv'
+    datainfo['tree_dir'] = '202308_bird_dataset_mMDS.xyz_3Dprojection'
+    datainfo['tree_type'] = 'spherical'
+    datainfo['coordinates_file'] = 'aves_families.divergence_time.mMDS.xyz.csv'
+    datainfo['newick_file'] = 'kimball2019_adapted_family.timetree.nwk'
+    datainfo['seq2taxon_file'] = 'aves.seqId2taxon.csv'
+    datainfo['lineage_columns'] = [27, 34]
+    datainfo['transform_tree_z'] = 0.0 # 75.0
+    datainfo['scale_tree_z'] = 1.0
+    birds(datainfo, vocab,
+          do_consensus=False, do_sequence=False, do_sequence_lineage=False, 
+          do_slice_by_clade=False, do_slice_by_lineage=False, do_slice_by_taxon=False,
+          do_tree = True)
+
+
+
+def process_insects(datainfo, vocab):
+    """
+    Set up and run each of the insect data sets.
+
+    :param datainfo: Metadata about the dataset.
+    :type datainfo: dict of {str : list}
+    :param vocab: A taxon to common name DataFrame.
+    :type vocab: DataFrame
+    """
 
     # Insects
     # ------------------------------------------------------------------------
@@ -380,220 +462,231 @@ def main():
     # files for OpenSpace.
     #
     # Tree internal nodes and leaves 
+    datainfo['dir'] = 'insects'
+    datainfo['sub_project'] = 'Insects'
+    datainfo['metadata_file'] = None
+
+
+    # Right now, all insect plots are sorted by order, meaning that points are
+    # colored by order. This is a bit of a simplification, but it's a start.
+    # Also I'm not sure how we'd color by family, as there are hundreds. It
+    # might be possible to organize by color family, for example shades of a given
+    # color represent families within a certain order. But with 29-30 recognized
+    # insect orders, it's a bit of a challenge to find that many distinct colors
+    # with shades that would be easily distinguishable.
+    #
+    # This colormap file is pre-constructed and ready to go. It contains a single
+    # color for each family, and the color name and family are in the comment
+    # for each color. When the tree is constructed, the order names in the 
+    # color file are used for lookups.
+    datainfo['os_colormap_file'] = 'insect_orders.cmap'
+
+    # You can omit the last branch of the tree for clarity. For now, let's
+    # keep it in.
+    datainfo['omit_last_branch'] = False
+
+    ####################################################
+    # Insect order trees. This is fewer points than the family or (hopefully soon
+    # to be incorporated) genus level tree.
+    ####################################################
     
-    if ('insects' not in args.skip):
-        datainfo['dir'] = 'insects'
-        datainfo['sub_project'] = 'Insects'
-        datainfo['metadata_file'] = None
+    # "Tabletop" 2D tree.
+    datainfo['version'] = '1'
+    datainfo['catalog_directory'] = 'timetree_insecta_order_mMDS_xy'
+    datainfo['tree_dir'] = 'timetree_insecta_order_mMDS_xy'
+    datainfo['tree_type'] = 'tabletop'
+    datainfo['newick_file'] = 'Insecta_order.nwk'
+    datainfo['coordinates_file'] = 'Insecta_order.mMDS.xy.csv'
+    datainfo['transform_tree_z'] = 0.0 # 75.0
+    datainfo['scale_tree_z'] = 1.0
+    insects(datainfo, vocab, do_tree = True)
+    
+    # 3D tree, non-spherical.
+    datainfo['version'] = '1'
+    datainfo['catalog_directory'] = 'timetree_insecta_order_mMDS_xyz'
+    datainfo['tree_dir'] = 'timetree_insecta_order_mMDS_xyz'
+    datainfo['tree_type'] = '3D'
+    datainfo['newick_file'] = 'Insecta_order.nwk'
+    datainfo['coordinates_file'] = 'Insecta_order_mds3.xyz.csv'
+    datainfo['transform_tree_z'] = 0.0 # 75.0
+    datainfo['scale_tree_z'] = 1.0
+    #datainfo['dump_debug_tree'] = True
+    insects(datainfo, vocab, do_tree = True)
+    
+    # 3D tree, spherical.
+    datainfo['version'] = '1'
+    datainfo['catalog_directory'] = 'timetree_insecta_order_mMDS_xyz_spherical'
+    datainfo['tree_dir'] = 'timetree_insecta_order_mMDS_xyz_spherical'
+    datainfo['tree_type'] = 'spherical'
+    datainfo['newick_file'] = 'Insecta_order.nwk'
+    datainfo['coordinates_file'] = 'Insecta_order_mds3.xyz.csv'
+    datainfo['transform_tree_z'] = 0.0 # 75.0
+    datainfo['scale_tree_z'] = 1.0
+    insects(datainfo, vocab, do_tree = True)
+    
+    
+    ####################################################
+    # Insect family trees. 
+    #
+    # The metadata file for these trees contains the mapping of family to order.
+    # This file is hand-tweaked to match all the families in this particular
+    # dataset, including some wonky names like "Gryllidae-1". This is a bit of a
+    # hack, but it's actually kind of necessary because there are some
+    # inconsistencies and missing bits in the taxonomy db from NCBI. So, we're
+    # kind of forced to construct this by hand. Besides, it's a LOT faster
+    # than loading in the NCBI taxonomy db and trying to match everything up
+    # on every single run.
+    ####################################################
+    
+    # Common parameters for all insect family trees.
+    datainfo['leaf-type'] = 'family'
+    datainfo['clade-type'] = 'order'
+    datainfo['metadata_file'] = 'insecta_family_order_taxonomy.csv'
+    datainfo['newick_file'] = 'Insecta_family.nwk'
+    datainfo['transform_tree_z'] = 0.0 # 75.0
+    datainfo['scale_tree_z'] = 1.0
+
+    # "Tabletop" 2D tree.
+    datainfo['version'] = '1'
+    datainfo['catalog_directory'] = 'timetree_insecta_family_mMDS_xy'
+    datainfo['tree_dir'] = 'timetree_insecta_family_mMDS_xy'
+    datainfo['coordinates_file'] = 'Insecta_family.mMDS.xy.csv'
+    datainfo['tree_type'] = 'tabletop'
+    insects(datainfo, vocab, do_tree = True)
+    
+    # 3D tree.
+    datainfo['version'] = '1'
+    datainfo['catalog_directory'] = 'timetree_insecta_family_mMDS_xyz'
+    datainfo['tree_dir'] = 'timetree_insecta_family_mMDS_xyz'
+    datainfo['coordinates_file'] = 'Insecta_family_mds3.xyz.csv'
+    datainfo['tree_type'] = '3D'
+    insects(datainfo, vocab, do_tree = True)
+    
+    # 3D tree, spherical.
+    datainfo['version'] = '1'
+    datainfo['catalog_directory'] = 'timetree_insecta_family_mMDS_xyz_spherical'
+    datainfo['tree_dir'] = 'timetree_insecta_family_mMDS_xyz_spherical'
+    datainfo['coordinates_file'] = 'Insecta_family_mds3.xyz.csv'
+    datainfo['tree_type'] = 'spherical'
+    insects(datainfo, vocab, do_tree = True)
+    
+    """
+    # The current genus and species trees are from MDS runs that didn't
+    # really work.
 
+    ####################################################
+    # Insect genus trees.
+    ####################################################
+    datainfo['version'] = '1'
+    datainfo['catalog_directory'] = 'timetree_insecta_genus_mMDS_xyz'
+    datainfo['tree_dir'] = 'timetree_insecta_genus_mMDS_xyz'
+    datainfo['metadata_file'] = None
+    datainfo['tree_leaves_file'] = 'Insecta_genus.mMDS3.xyz.leaves.csv'
+    datainfo['tree_branches_file'] = 'Insecta_genus.mMDS3.xyz.branches.csv'
+    datainfo['tree_internal_file'] = 'Insecta_genus.mMDS3.xyz.internal.csv'
+    datainfo['transform_tree_z'] = 0.0 # 75.0
+    datainfo['scale_tree_z'] = 1.0
+    insects(datainfo, vocab, do_tree = True)
 
-        # Right now, all insect plots are sorted by order, meaning that points are
-        # colored by order. This is a bit of a simplification, but it's a start.
-        # Also I'm not sure how we'd color by family, as there are hundreds. It
-        # might be possible to organize by color family, for example shades of a given
-        # color represent families within a certain order. But with 29-30 recognized
-        # insect orders, it's a bit of a challenge to find that many distinct colors
-        # with shades that would be easily distinguishable.
-        #
-        # This colormap file is pre-constructed and ready to go. It contains a single
-        # color for each family, and the color name and family are in the comment
-        # for each color. When the tree is constructed, the order names in the 
-        # color file are used for lookups.
-        datainfo['os_colormap_file'] = 'insect_orders.cmap'
-
-        # You can omit the last branch of the tree for clarity. For now, let's
-        # keep it in.
-        datainfo['omit_last_branch'] = False
-
-        ####################################################
-        # Insect order trees. This is fewer points than the family or (hopefully soon
-        # to be incorporated) genus level tree.
-        ####################################################
-        
-        # "Tabletop" 2D tree.
-        datainfo['version'] = '1'
-        datainfo['catalog_directory'] = 'timetree_insecta_order_mMDS_xy'
-        datainfo['tree_dir'] = 'timetree_insecta_order_mMDS_xy'
-        datainfo['tree_type'] = 'tabletop'
-        datainfo['newick_file'] = 'Insecta_order.nwk'
-        datainfo['coordinates_file'] = 'Insecta_order.mMDS.xy.csv'
-        datainfo['transform_tree_z'] = 0.0 # 75.0
-        datainfo['scale_tree_z'] = 1.0
-        insects(datainfo, vocab, do_tree = True)
-        
-        # 3D tree, non-spherical.
-        datainfo['version'] = '1'
-        datainfo['catalog_directory'] = 'timetree_insecta_order_mMDS_xyz'
-        datainfo['tree_dir'] = 'timetree_insecta_order_mMDS_xyz'
-        datainfo['tree_type'] = '3D'
-        datainfo['newick_file'] = 'Insecta_order.nwk'
-        datainfo['coordinates_file'] = 'Insecta_order_mds3.xyz.csv'
-        datainfo['transform_tree_z'] = 0.0 # 75.0
-        datainfo['scale_tree_z'] = 1.0
-        #datainfo['dump_debug_tree'] = True
-        insects(datainfo, vocab, do_tree = True)
-        
-        # 3D tree, spherical.
-        datainfo['version'] = '1'
-        datainfo['catalog_directory'] = 'timetree_insecta_order_mMDS_xyz_spherical'
-        datainfo['tree_dir'] = 'timetree_insecta_order_mMDS_xyz_spherical'
-        datainfo['tree_type'] = 'spherical'
-        datainfo['newick_file'] = 'Insecta_order.nwk'
-        datainfo['coordinates_file'] = 'Insecta_order_mds3.xyz.csv'
-        datainfo['transform_tree_z'] = 0.0 # 75.0
-        datainfo['scale_tree_z'] = 1.0
-        insects(datainfo, vocab, do_tree = True)
-        
-        
-        ####################################################
-        # Insect family trees. 
-        #
-        # The metadata file for these trees contains the mapping of family to order.
-        # This file is hand-tweaked to match all the families in this particular
-        # dataset, including some wonky names like "Gryllidae-1". This is a bit of a
-        # hack, but it's actually kind of necessary because there are some
-        # inconsistencies and missing bits in the taxonomy db from NCBI. So, we're
-        # kind of forced to construct this by hand. Besides, it's a LOT faster
-        # than loading in the NCBI taxonomy db and trying to match everything up
-        # on every single run.
-        ####################################################
-        
-        # Common parameters for all insect family trees.
-        datainfo['leaf-type'] = 'family'
-        datainfo['clade-type'] = 'order'
-        datainfo['metadata_file'] = 'insecta_family_order_taxonomy.csv'
-        datainfo['newick_file'] = 'Insecta_family.nwk'
-        datainfo['transform_tree_z'] = 0.0 # 75.0
-        datainfo['scale_tree_z'] = 1.0
-
-        # "Tabletop" 2D tree.
-        datainfo['version'] = '1'
-        datainfo['catalog_directory'] = 'timetree_insecta_family_mMDS_xy'
-        datainfo['tree_dir'] = 'timetree_insecta_family_mMDS_xy'
-        datainfo['coordinates_file'] = 'Insecta_family.mMDS.xy.csv'
-        datainfo['tree_type'] = 'tabletop'
-        insects(datainfo, vocab, do_tree = True)
-        
-        # 3D tree.
-        datainfo['version'] = '1'
-        datainfo['catalog_directory'] = 'timetree_insecta_family_mMDS_xyz'
-        datainfo['tree_dir'] = 'timetree_insecta_family_mMDS_xyz'
-        datainfo['coordinates_file'] = 'Insecta_family_mds3.xyz.csv'
-        datainfo['tree_type'] = '3D'
-        insects(datainfo, vocab, do_tree = True)
-        
-        # 3D tree, spherical.
-        datainfo['version'] = '1'
-        datainfo['catalog_directory'] = 'timetree_insecta_family_mMDS_xyz_spherical'
-        datainfo['tree_dir'] = 'timetree_insecta_family_mMDS_xyz_spherical'
-        datainfo['coordinates_file'] = 'Insecta_family_mds3.xyz.csv'
-        datainfo['tree_type'] = 'spherical'
-        insects(datainfo, vocab, do_tree = True)
-        
-        """
-        # The current genus and species trees are from MDS runs that didn't
-        # really work.
-
-        ####################################################
-        # Insect genus trees.
-        ####################################################
-        datainfo['version'] = '1'
-        datainfo['catalog_directory'] = 'timetree_insecta_genus_mMDS_xyz'
-        datainfo['tree_dir'] = 'timetree_insecta_genus_mMDS_xyz'
-        datainfo['metadata_file'] = None
-        datainfo['tree_leaves_file'] = 'Insecta_genus.mMDS3.xyz.leaves.csv'
-        datainfo['tree_branches_file'] = 'Insecta_genus.mMDS3.xyz.branches.csv'
-        datainfo['tree_internal_file'] = 'Insecta_genus.mMDS3.xyz.internal.csv'
-        datainfo['transform_tree_z'] = 0.0 # 75.0
-        datainfo['scale_tree_z'] = 1.0
-        insects(datainfo, vocab, do_tree = True)
-
-        datainfo['version'] = '1'
-        datainfo['catalog_directory'] = 'timetree_insecta_genus_mMDS_xyz_spherical'
-        datainfo['tree_dir'] = 'timetree_insecta_genus_mMDS_xyz_spherical'
-        datainfo['metadata_file'] = None
-        datainfo['tree_leaves_file'] = 'Insecta_genus.mMDS3.xyz-spherical.leaves.csv'
-        datainfo['tree_branches_file'] = 'Insecta_genus.mMDS3.xyz-spherical.branches.csv'
-        datainfo['tree_internal_file'] = 'Insecta_genus.mMDS3.xyz-spherical.internal.csv'
-        datainfo['transform_tree_z'] = 0.0 # 75.0
-        datainfo['scale_tree_z'] = 1.0
-        insects(datainfo, vocab, do_tree = True)
-
-        ####################################################
-        # Insect species trees.
-        ####################################################
-        datainfo['version'] = '1'
-        datainfo['catalog_directory'] = 'timetree_insecta_species_mMDS_xyz'
-        datainfo['tree_dir'] = 'timetree_insecta_species_mMDS_xyz'
-        datainfo['metadata_file'] = None
-        datainfo['tree_leaves_file'] = 'Insecta_species.mMDS3.xyz.leaves.csv'
-        datainfo['tree_branches_file'] = 'Insecta_species.mMDS3.xyz.branches.csv'
-        datainfo['tree_internal_file'] = 'Insecta_species.mMDS3.xyz.internal.csv'
-        datainfo['transform_tree_z'] = 0.0 # 75.0
-        datainfo['scale_tree_z'] = 1.0
-        insects(datainfo, vocab, do_tree = True)
-
-        datainfo['version'] = '1'
-        datainfo['catalog_directory'] = 'timetree_insecta_species_mMDS_xyz_spherical'
-        datainfo['tree_dir'] = 'timetree_insecta_species_mMDS_xyz_spherical'
-        datainfo['metadata_file'] = None
-        datainfo['tree_leaves_file'] = 'Insecta_species.mMDS3.xyz-spherical.leaves.csv'
-        datainfo['tree_branches_file'] = 'Insecta_species.mMDS3.xyz-spherical.branches.csv'
-        datainfo['tree_internal_file'] = 'Insecta_species.mMDS3.xyz-spherical.internal.csv'
-        datainfo['transform_tree_z'] = 0.0 # 75.0
-        datainfo['scale_tree_z'] = 1.0
-        insects(datainfo, vocab, do_tree = True)
-        """
-        
+    datainfo['version'] = '1'
+    datainfo['catalog_directory'] = 'timetree_insecta_genus_mMDS_xyz_spherical'
+    datainfo['tree_dir'] = 'timetree_insecta_genus_mMDS_xyz_spherical'
+    datainfo['metadata_file'] = None
+    datainfo['tree_leaves_file'] = 'Insecta_genus.mMDS3.xyz-spherical.leaves.csv'
+    datainfo['tree_branches_file'] = 'Insecta_genus.mMDS3.xyz-spherical.branches.csv'
+    datainfo['tree_internal_file'] = 'Insecta_genus.mMDS3.xyz-spherical.internal.csv'
+    datainfo['transform_tree_z'] = 0.0 # 75.0
+    datainfo['scale_tree_z'] = 1.0
+    insects(datainfo, vocab, do_tree = True)
+
+    ####################################################
+    # Insect species trees.
+    ####################################################
+    datainfo['version'] = '1'
+    datainfo['catalog_directory'] = 'timetree_insecta_species_mMDS_xyz'
+    datainfo['tree_dir'] = 'timetree_insecta_species_mMDS_xyz'
+    datainfo['metadata_file'] = None
+    datainfo['tree_leaves_file'] = 'Insecta_species.mMDS3.xyz.leaves.csv'
+    datainfo['tree_branches_file'] = 'Insecta_species.mMDS3.xyz.branches.csv'
+    datainfo['tree_internal_file'] = 'Insecta_species.mMDS3.xyz.internal.csv'
+    datainfo['transform_tree_z'] = 0.0 # 75.0
+    datainfo['scale_tree_z'] = 1.0
+    insects(datainfo, vocab, do_tree = True)
 
-        
-        datainfo['version'] = '1'
-        # This tree does not have coordinates from data reduction runs, so the
-        # tree geometry needs to be generated/drawn on the fly.
-        datainfo['coordinates_file'] = None
-        datainfo['catalog_directory'] = 'Wiegmann_et_al_tree'
-        datainfo['tree_dir'] = 'Wiegmann_et_al_tree'
-        datainfo['newick_file'] = 'Wiegmann_et_al.nwk'
-        datainfo['branch_scaling_factor'] = 400.0
-        datainfo['taxon_scaling_factor'] = 10.0
-        #datainfo['newick_file'] = 'simple.nwk'
-        datainfo['tree_dir'] = 'Wiegmann_et_al_tree'
-        insects(datainfo, vocab)
-        
+    datainfo['version'] = '1'
+    datainfo['catalog_directory'] = 'timetree_insecta_species_mMDS_xyz_spherical'
+    datainfo['tree_dir'] = 'timetree_insecta_species_mMDS_xyz_spherical'
+    datainfo['metadata_file'] = None
+    datainfo['tree_leaves_file'] = 'Insecta_species.mMDS3.xyz-spherical.leaves.csv'
+    datainfo['tree_branches_file'] = 'Insecta_species.mMDS3.xyz-spherical.branches.csv'
+    datainfo['tree_internal_file'] = 'Insecta_species.mMDS3.xyz-spherical.internal.csv'
+    datainfo['transform_tree_z'] = 0.0 # 75.0
+    datainfo['scale_tree_z'] = 1.0
+    insects(datainfo, vocab, do_tree = True)
+    """
+    
+
+    
+    datainfo['version'] = '1'
+    # This tree does not have coordinates from data reduction runs, so the
+    # tree geometry needs to be generated/drawn on the fly.
+    datainfo['coordinates_file'] = None
+    datainfo['catalog_directory'] = 'Wiegmann_et_al_tree'
+    datainfo['tree_dir'] = 'Wiegmann_et_al_tree'
+    datainfo['newick_file'] = 'Wiegmann_et_al.nwk'
+    datainfo['branch_scaling_factor'] = 400.0
+    datainfo['taxon_scaling_factor'] = 10.0
+    #datainfo['newick_file'] = 'simple.nwk'
+    datainfo['tree_dir'] = 'Wiegmann_et_al_tree'
+    insects(datainfo, vocab)
+
+
+
+def process_splattergram(datainfo, vocab):
+    """
+    Set up and run each of the animal splattergram data sets.
+
+    :param datainfo: Metadata about the dataset.
+    :type datainfo: dict of {str : list}
+    :param vocab: A taxon to common name DataFrame.
+    :type vocab: DataFrame
+    """
 
     # Splattergram of animal life
     # ------------------------------------------------------------------------
     # This is Wandrille's splattergram of life, sorted taxonomically. The
     # idea is a field of stars, where each star is a species.
-    if ('splattergram' not in args.skip):
-        datainfo['dir'] = 'animal_splattergram'
-        datainfo['sub_project'] = 'Animalia'
+    datainfo['dir'] = 'animal_splattergram'
+    datainfo['sub_project'] = 'Animalia'
+
+    
+    datainfo['version'] = '1'
+    #datainfo['csv_file'] = 'multicellular_animals_species.3DcMDS.csv'
+    #datainfo['csv_file'] = 'insects_on_sphere_10000.csv'
+    datainfo['csv_file'] = 'test_lat_lon.csv'
+    datainfo['scale_factor'] = common.EARTH_RADIUS_IN_KM
+    datainfo['taxonomy_file'] = 'multicellular_animals_species.timetree.lineages.csv'
+
+    common.print_head_status(datainfo['sub_project'])
+
+    # Make a new splattergram object.
+    mysplattergram = splattergram.splattergram()
+
+    mysplattergram.process_data(datainfo)
+    mysplattergram.make_random_points_on_sphere_csv_file(datainfo)
+    #mysplattergram.make_test_points_on_sphere(datainfo)
+    #mysplattergram.make_asset(datainfo)
+    
+    datainfo['start_points'] = 'anax_junius_start_on_unit_sphere_xyz.csv'
+    datainfo['end_points'] = 'anax_junius_end_on_unit_sphere_xyz.csv'
+    datainfo['save_path'] = None
+    
+    mypoints = interpolated_points.interpolated_points()
+    mypoints.process_interpolated_points(datainfo, check_duplicates = False)
+    #mypoints.make_asset_interpolated_points(datainfo)
+
+
 
-        
-        datainfo['version'] = '1'
-        #datainfo['csv_file'] = 'multicellular_animals_species.3DcMDS.csv'
-        #datainfo['csv_file'] = 'insects_on_sphere_10000.csv'
-        datainfo['csv_file'] = 'test_lat_lon.csv'
-        datainfo['scale_factor'] = common.EARTH_RADIUS_IN_KM
-        datainfo['taxonomy_file'] = 'multicellular_animals_species.timetree.lineages.csv'
-
-        common.print_head_status(datainfo['sub_project'])
-
-        # Make a new splattergram object.
-        mysplattergram = splattergram.splattergram()
-
-        mysplattergram.process_data(datainfo)
-        mysplattergram.make_random_points_on_sphere_csv_file(datainfo)
-        #mysplattergram.make_test_points_on_sphere(datainfo)
-        #mysplattergram.make_asset(datainfo)
-        
-        datainfo['start_points'] = 'anax_junius_start_on_unit_sphere_xyz.csv'
-        datainfo['end_points'] = 'anax_junius_end_on_unit_sphere_xyz.csv'
-        datainfo['save_path'] = None
-        
-        mypoints = interpolated_points.interpolated_points()
-        mypoints.process_interpolated_points(datainfo, check_duplicates = False)
-        #mypoints.make_asset_interpolated_points(datainfo)
 
 
 def make_color_tables(datainfo):
@@ -6,7 +6,7 @@
 The color module processes a list of colors into a usable color table file (:file:`.dat`). This color table file is then sampled to make color map files (:file:`.cmap`) that are OpenSpace-ready.
 
 .. note::
-    Theoretically, this module needs to be run only once, assuming you don't alter the ``chosen_colors`` list of preferred colors defined in ``crayola_color_table()``. Once you run it for the first time, the function call ``make_color_tables(datainfo)`` may be commented out of :file:`main.py`.
+    Theoretically, this module needs to be run only once, assuming you don't alter the ``CHOSEN_COLORS`` list of preferred colors defined at the top of this module. Once you run it for the first time, the function call ``make_color_tables(datainfo)`` may be commented out of :file:`main.py`.
 
     
 
@@ -20,14 +20,34 @@ Generating Color Tables
 
 """
 
+import io
+import functools
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from colormap import hex2rgb
 
 from src import common
 
 
 
+# Set up a select list of colors to mine for color maps
+# This gets rid of colors that are too close in hue, etc.
+CHOSEN_COLORS = ('Scarlet', 'Orange',
+    'Maize', 'Lemon Yellow', 'Yellow-Green',
+    'Fern', 'Asparagus', 'Sea Green',
+    'Aquamarine', 'Blue-Green', 'Sky Blue', 'Periwinkle', 'Indigo',
+    'Violet-Blue', 'Purple Heart', 'Wisteria', 'Fuchsia', 'Orchid',
+    'Magenta', 'Carnation Pink', 'Salmon',
+    'Mahogany', 'Burnt Sienna', 'Sepia', 'Peach', 'Shadow',
+    'Silver', 'Blue-Gray')
+
+# Sort the colors to alternate colors so similar colors aren't beside one another.
+# We step through every 4th color in the CHOSEN_COLORS list, adding the subsequent
+# subsets to the new sorted list. This is computed once, at import.
+CHOSEN_COLORS_SORTED = CHOSEN_COLORS[3::4] + CHOSEN_COLORS[1::4] + CHOSEN_COLORS[2::4] + CHOSEN_COLORS[0::4]
+
+
+
 # -----------------------------------------------------------------------------
 def crayola_color_table(datainfo):
     """
@@ -43,7 +63,7 @@ def crayola_color_table(datainfo):
 
     One result of processing the crayola colors is a file called :file:`catalogs_processed/color_tables/crayola/crayola.dat`. This is a master list of colors in red-green-blue-alpha format, along with the name of the color.
 
-    We also produce a second, customized color table called :file:`catalogs_processed/color_tables/crayola/chosen_colors.dat`. This is a subsample of colors from the main list determined by the ``chosen_colors`` list in the ``crayola_color_table()`` function. We take the ``chosen_colors`` list, change the order of colors, and print it to a file. This is the main file used to generate OpenSpace-ready color map files (:file:`.cmap`).
+    We also produce a second, customized color table called :file:`catalogs_processed/color_tables/crayola/chosen_colors.dat`. This is a subsample of colors from the main list determined by the module-level ``CHOSEN_COLORS`` tuple. We take the ``CHOSEN_COLORS`` tuple, change the order of colors, and print it to a file. This is the main file used to generate OpenSpace-ready color map files (:file:`.cmap`).
 
     These chosen colors include:
 
@@ -61,20 +81,38 @@ def crayola_color_table(datainfo):
     inpath = Path.cwd() / common.DATA_DIRECTORY / common.COLOR_DIRECTORY / datainfo['catalog_directory'] / 'crayola_colors.html'
     common.test_input_file(inpath)
 
-    table = pd.read_html(inpath)
+    # Skip the work if both color tables already exist and are newer than the HTML
+    # source and this module (which holds the CHOSEN_COLORS list)
+    outdir = Path.cwd() / common.PROCESSED_DATA_DIRECTORY / common.COLOR_DIRECTORY / datainfo['catalog_directory']
+    source_mtime = max(inpath.stat().st_mtime_ns, Path(__file__).stat().st_mtime_ns)
+    outputs = (outdir / 'crayola.dat', outdir / 'chosen_colors.dat')
+    if all(out.is_file() and out.stat().st_mtime_ns > source_mtime for out in outputs):
+        print(common.PADDING + '  Color tables are up to date, skipping.')
+        print()
+        return
+
+    # Read the file in one shot and hand the buffer to lxml's parser directly,
+    # keeping only the table with the color names
+    html = inpath.read_bytes()
+    table = pd.read_html(io.BytesIO(html), flavor='lxml', match='Name')
 
     # Define the table
     crayola_colors = table[0]
 
     # Set a df and rename the Hex column
     colors = crayola_colors[['Name', 'Hexadecimal in their website depiction  [b]']]
-    colors = colors.rename(columns = {'Hexadecimal in their website depiction  [b]':'hex'})
+    colors = colors.rename(columns = {'Hexadecimal in their website depiction  [b]':'hex'}, copy=False)
+
+    # Keep only the rows that have a hex color
+    colors = colors[colors['hex'].notna()].copy()
 
-    # Drop any rows that do not have a hex color
-    colors.drop(colors[colors['hex'].isnull()].index, inplace=True)
+    # Store the color names as a categorical, so name lookups hash codes rather than strings
+    colors['Name'] = colors['Name'].astype('category')
 
-    # Convert the colors usung the rgba() function above.
-    colors[['red', 'green', 'blue', 'alpha']] = colors.apply(lambda x: rgba(x['hex']), axis=1, result_type='expand')
+    # Convert the colors using the rgba() function below, then build the
+    # name + RGBA dataframe in one go rather than adding columns one at a time.
+    rgba_df = pd.DataFrame(rgba(colors['hex']), columns=['red', 'green', 'blue', 'alpha'], index=colors.index)
+    colors = pd.concat([colors[['Name']], rgba_df], axis=1, copy=False)
 
     # Compute a colorindex value so we can sort colors if we like
     #colors['index'] = (colors['red'] + colors['green'] + colors['blue']) / 3.0
@@ -84,32 +122,12 @@ def crayola_color_table(datainfo):
     outpath = Path.cwd() / common.PROCESSED_DATA_DIRECTORY / common.COLOR_DIRECTORY / datainfo['catalog_directory']
     common.test_path(outpath)
 
-    outpath = outpath / outfile
-    with open(outpath, 'wt') as color_table:
-        for _, row in colors.iterrows():
-            print(f"{row['red']:.6f} {row['green']:.6f} {row['blue']:.6f} {row['alpha']:.6f} # {row['Name']}", file=color_table)
-
-
-
-    # Set up a select list of colors to mine for color maps
-    # This gets rid of colors that are too close in hue, etc.
-    chosen_colors = ['Scarlet', 'Orange', \
-        'Maize', 'Lemon Yellow', 'Yellow-Green', \
-        'Fern', 'Asparagus', 'Sea Green', \
-        'Aquamarine', 'Blue-Green', 'Sky Blue', 'Periwinkle', 'Indigo', \
-        'Violet-Blue', 'Purple Heart', 'Wisteria', 'Fuchsia', 'Orchid', \
-        'Magenta', 'Carnation Pink', 'Salmon', \
-        'Mahogany', 'Burnt Sienna', 'Sepia', 'Peach', 'Shadow', \
-        'Silver', 'Blue-Gray']
+    # Format every color line up front, then write the whole table in one shot
+    color_lines = [f"{red:.6f} {green:.6f} {blue:.6f} {alpha:.6f} # {name}\n" for name, red, green, blue, alpha in colors.itertuples(index=False, name=None)]
 
-
-    # Sort the colors to alternate colors so similar colors aren't beside one another.
-    # We step through every 4th color in the chosen_colors list, adding the subsequent
-    # subsets to the new sorted list.
-    chosen_colors_sorted = chosen_colors[3::4]
-    chosen_colors_sorted.extend(chosen_colors[1::4])
-    chosen_colors_sorted.extend(chosen_colors[2::4])
-    chosen_colors_sorted.extend(chosen_colors[0::4])
+    outpath = outpath / outfile
+    with open(outpath, 'wb', buffering=1<<20) as color_table:
+        color_table.write(''.join(color_lines).encode('utf-8'))
 
 
 
@@ -117,19 +135,19 @@ def crayola_color_table(datainfo):
     outpath_chosen = Path.cwd() / common.PROCESSED_DATA_DIRECTORY / common.COLOR_DIRECTORY / datainfo['catalog_directory']
     common.test_path(outpath_chosen)
 
-    outpath_chosen = outpath_chosen / outfile_chosen
-    with open(outpath_chosen, 'wt') as chosen_color_table:
-        
-        # Cycly thru the color names in the chosen_colors list
-        for color in chosen_colors_sorted:
+    # Index the formatted lines by color name (a name can show up more than once in
+    # the scraped table, so keep every line for it)
+    lines_by_name = {}
+    for name, line in zip(colors['Name'], color_lines):
+        lines_by_name.setdefault(name, []).append(line)
 
-            # Cycle thru the full color table
-            for col, row in colors.iterrows():
+    # Cycle thru the color names in the CHOSEN_COLORS_SORTED list, and collect
+    # the matching lines from the full color table in that order
+    chosen_lines = [line for color in CHOSEN_COLORS_SORTED for line in lines_by_name.get(color, ())]
 
-                # If we have a matching chosen color in the full color table, 
-                # print to the chosen color table file
-                if row['Name'] == color:
-                    print(f"{row['red']:.6f} {row['green']:.6f} {row['blue']:.6f} {row['alpha']:.6f} # {row['Name']}", file=chosen_color_table)
+    outpath_chosen = outpath_chosen / outfile_chosen
+    with open(outpath_chosen, 'wb', buffering=1<<20) as chosen_color_table:
+        chosen_color_table.write(''.join(chosen_lines).encode('utf-8'))
     
 
     common.out_file_message(outpath_chosen)
@@ -141,20 +159,21 @@ def crayola_color_table(datainfo):
 
 def rgba(hex):
     """
-    Convert a hex color to an RGB, then normalize between 0-1.
+    Convert hex colors to RGB, then normalize between 0-1.
 
-    :param hex: A hexidecimal color value
-    :type hex: str
-    :return: A pandas series of red, green, blue, and alpha.
-    :rtype: Series
+    :param hex: Hexidecimal color values
+    :type hex: Series of str
+    :return: An array with one row of red, green, blue, and alpha per color.
+    :rtype: ndarray
     """
-    rgb = hex2rgb(hex)
-    red = rgb[0] / 255
-    green = rgb[1] / 255
-    blue = rgb[2] / 255
-    alpha = 1.0
+    # Parse each hex string as one integer and shift out the 8-bit channels
+    value = hex.str.lstrip('#').apply(int, base=16).to_numpy(dtype=np.int64)
+    red = ((value >> 16) & 0xff) / 255
+    green = ((value >> 8) & 0xff) / 255
+    blue = (value & 0xff) / 255
+    alpha = np.ones(len(value))
 
-    return pd.Series([red, green, blue, alpha])
+    return np.column_stack((red, green, blue, alpha))
 
 
 def read_cmap_into_df(cmap_path):
@@ -181,6 +200,26 @@ def read_cmap_into_df(cmap_path):
     :rtype: DataFrame
     """
 
+    # Parsed cmaps are cached on the path and modification time, so a cmap that
+    # is edited on disk is reparsed. Hand back a copy so callers can't alter the
+    # cached dataframe.
+    return _read_cmap_cached(str(cmap_path), Path(cmap_path).stat().st_mtime_ns).copy()
+
+
+
+@functools.lru_cache(maxsize=64)
+def _read_cmap_cached(cmap_path, mtime_ns):
+    """
+    Parse a cmap file into a dataframe. This does the work for ``read_cmap_into_df()``.
+
+    :param cmap_path: The path to the cmap file.
+    :type cmap_path: str
+    :param mtime_ns: Modification time of the cmap file, used only as part of the cache key.
+    :type mtime_ns: int
+    :return: A pandas dataframe of the cmap file.
+    :rtype: DataFrame
+    """
+
     # Read the cmap file into a dataframe. Unfortunately the file is a little too
     # complicated to use read_csv, so we will read it in an process it a line at
     # a time.
@@ -9,8 +9,9 @@ A module with constants and utility functions. Most of these functions deal with
 import re
 import csv
 import sys
-import math
+import numpy as np
 import pandas as pd
+from functools import lru_cache
 from pathlib import Path
 import colormap as cm
 #import str
@@ -61,6 +62,15 @@ TEXT_SIZE = '2.1'
 TEXT_MIN_SIZE = '15'
 TEXT_MAX_SIZE = '30'
 
+# The OpenSpace settings block written near the top of the point asset files. It's
+# built from the constants above once, at import, rather than line by line per asset.
+ASSET_SETTINGS = ('-- Set some parameters for OpenSpace settings\n'
+                  'local scale_factor = ' + POINT_SCALE_FACTOR + '\n'
+                  'local scale_exponent = ' + POINT_SCALE_EXPONENT + '\n'
+                  'local text_size = ' + TEXT_SIZE + '\n'
+                  'local text_min_size = ' + TEXT_MIN_SIZE + '\n'
+                  'local text_max_size = ' + TEXT_MAX_SIZE + '\n')
+
 
 
 
@@ -97,15 +107,31 @@ CHOSEN_COLOR_TABLE = ('Lemon Yellow', 'Sea Green', 'Periwinkle', 'Wisteria',
 # Output formatting
 PADDING = '  '
 
+# Speck file line patterns: data lines begin with a number or a minus number
+DATA_LINE_RE = re.compile(r'^-?[0-9]')
+DATAVAR_LINE_RE = re.compile(r'^datavar')
+
+# Color table line pattern: color lines begin n.n, like 0.7, and hold the RGB
+# values, an alpha of 1.0, and the color name after the #
+COLOR_LINE_RE = re.compile(r'^(?P<rgb>[0-9]\.[0-9]+ \S+ \S+) 1\.000000 # (?P<color_name>.*)$')
+
+# Color tables that have already been read, keyed by color table filename
+_COLOR_TABLES = {}
+
+# Directories that test_path() has already found or created
+_PATH_EXISTS_CACHE = set()
+
 # Paths
 # =============================================================================
 # Use this path for all codes in ./src. This is the base path of the project directory.
 #local_path = Path.cwd()
 #BASE_DIR = str(local_path).removesuffix('/src')
 #BASE_PATH = Path(BASE_DIR)
-#BASE_PATH = Path.cwd()
 #BASE_DIR = Path.cwd()
 
+# The scripts run from the project root, so look up the working directory once, at import
+BASE_PATH = Path.cwd()
+
 
 
 # Functions
@@ -122,7 +148,7 @@ def out_file_message(path):
     :type path: pathlib.PosixPath
     """
     # Get a relative path from the project root directory
-    relative_filepath = path.relative_to(Path.cwd())
+    relative_filepath = path.relative_to(BASE_PATH)
 
     # Get the file extension to determine the file type
     file_extension = Path(path).suffix
@@ -199,6 +225,36 @@ def header(datainfo, function_name='', script_name=''):
     :type script_name: str, optional
     """
 
+    return _build_header(datainfo['data_group_title'], datainfo['version'], datainfo['reference'], datainfo['author'], datainfo['data_group_desc'], function_name, script_name)
+
+
+
+
+
+# ---------------------------------------------------------------------------
+@lru_cache(maxsize=128)
+def _build_header(data_group_title, version, reference, author, data_group_desc, function_name, script_name):
+    """
+    Build the header lines for ``header()``. The result is cached, keyed on the dataset fields and the generating function and script.
+
+    :param data_group_title: Title of the data group.
+    :type data_group_title: str
+    :param version: Version of the data.
+    :type version: str
+    :param reference: Reference for the data.
+    :type reference: str
+    :param author: Author(s) of the data.
+    :type author: str
+    :param data_group_desc: Description of the data group.
+    :type data_group_desc: str
+    :param function_name: The name of the function that generated the file.
+    :type function_name: str
+    :param script_name: Name of the script (.py filename) that generated the file.
+    :type script_name: str
+    :return: The header lines.
+    :rtype: str
+    """
+
     institution = '''# Cosmic View of Life on Earth
 # American Museum of Natural History
 # https://www.haydenplanetarium.org/
@@ -217,10 +273,10 @@ def header(datainfo, function_name='', script_name=''):
         generated_by = '#\n'
 
 
-    data_title = '# ' + datainfo['data_group_title'] + ' version ' + datainfo['version'] + '\n'
-    reference = '# Reference: ' + datainfo['reference'] + '\n'
-    authors = '# By: ' + datainfo['author'] + '\n'
-    data_description = '#\n# ' + datainfo['data_group_desc'] + '\n#\n#'
+    data_title = '# ' + data_group_title + ' version ' + version + '\n'
+    reference = '# Reference: ' + reference + '\n'
+    authors = '# By: ' + author + '\n'
+    data_description = '#\n# ' + data_group_desc + '\n#\n#'
 
 
     header_lines = institution + generated_by + data_title + reference + authors + data_description
@@ -236,14 +292,21 @@ def read_color_table(color_table_file):
     """
     Read in the chosen color table, return as a dict.
 
+    The table is read from disk once per filename and kept in ``_COLOR_TABLES``, so callers must treat the returned dict as read-only.
+
     :param color_table_file: Filename of a color table file (.dat).
     :type color_table_file: str
     :return: A dictionary of color values and names.
     :rtype: dict
     """    
 
+    # Return the color table if we've already read it
+    color_table = _COLOR_TABLES.get(color_table_file)
+    if color_table is not None:
+        return color_table
+
     # Open the chosen colors table
-    color_table_path = Path.cwd() / PROCESSED_DATA_DIRECTORY / COLOR_DIRECTORY / 'crayola' / color_table_file
+    color_table_path = BASE_PATH / PROCESSED_DATA_DIRECTORY / COLOR_DIRECTORY / 'crayola' / color_table_file
     with open(color_table_path, 'rt') as color_file:
 
         # Read the lines in the color table
@@ -255,16 +318,14 @@ def read_color_table(color_table_file):
         # Loop through the lines of the color table
         for line in lines:
 
-            # Strip off the end new lines
-            line.rstrip()
-
             # Split the line by #, making the data and name fields
             line_fields_init = line.split(' # ')
             data = line_fields_init[0]
             name = line_fields_init[1].rstrip()
             
-            # Strip off the alpha value--we don't need that for OpenSpace color values
-            rgb = data.rstrip(' 1.000000')
+            # Strip off the alpha value--we don't need that for OpenSpace color values.
+            # Note rstrip() would strip a set of characters, eating trailing zeros too.
+            rgb = data.removesuffix(' 1.000000').rstrip()
 
             # Save the rgb string to the "nameth" color in the color table
             color_table[name] = rgb
@@ -280,6 +341,8 @@ def read_color_table(color_table_file):
             #color_table[name] = {'rgb': rgb}
 
 
+    _COLOR_TABLES[color_table_file] = color_table
+
     return color_table
 
 
@@ -304,15 +367,8 @@ def find_color(color_table_file, color_name):
     # Read in the main color table
     color_table = read_color_table(color_table_file)
 
-    # Cycle through the main color_table to pluck the RGB values
-    # for the color_name passed to the function.
-    for name, rgb in color_table.items():
-
-        # When the color names match, return the rgb string
-        if(name == color_name):
-            break
-    
-    return rgb
+    # Pluck the RGB values for the color_name passed to the function
+    return color_table[color_name]
 
 
 
@@ -336,22 +392,12 @@ def color2dict(source_color_file, input_color_list):
     :rtype: dict
     """
 
-    final_color_table = {}
-
     # Read in the main color table
     color_table = read_color_table(source_color_file)
 
-    # Cycle through the given color table file to pluck the RGB values
-    # for the color_name passed to the function.
-    for color in input_color_list:
-
-        for name, rgb in color_table.items():
-
-            if(name == color):
-                rgb = rgb.replace(' ', ', ')
-                final_color_table[name] = rgb
-
-    return final_color_table
+    # Pluck the RGB values for each input color straight from the color table,
+    # comma-separated for OpenSpace
+    return {color: color_table[color].replace(' ', ', ') for color in input_color_list if color in color_table}
 
 
 
@@ -363,61 +409,25 @@ def get_crayola_color_df(num_colors):
     Get a color dataframe with the number of colors requested.
     """    
 
-    inpath = Path.cwd() / PROCESSED_DATA_DIRECTORY / COLOR_DIRECTORY / 'crayola' / 'crayola.dat'
+    inpath = BASE_PATH / PROCESSED_DATA_DIRECTORY / COLOR_DIRECTORY / 'crayola' / 'crayola.dat'
 
     #color_map_file = color_file
     #color_file_path = Path.cwd() / PROCESSED_DATA_DIRECTORY / COLOR_DIRECTORY / color_map_file
     test_path(inpath)
 
-    with open(inpath, 'rt') as color_file:
-
-        # Read the lines in the color map file
-        color_list = [line.strip() for line in color_file]
-
-        # Set the color list to only include lines that begin n.n, like 0.7
-        # This will exclude the commented header lines, and the total number of colors, which is an int
-        color_list = [line for line in color_list if re.match('[0-9].[0-9]', line)]
-
-
+    # Read the lines in the color map file
+    color_lines = pd.Series(inpath.read_text().splitlines()).str.strip()
 
-    # Process the lines to parse the fields
-    color_values = []
-    color_names = []
-    for color_line in color_list:
+    # Pull the RGB field (without the alpha value of 1.0, we don't need that) and
+    # the color name out of every line in one pass. Lines that don't begin n.n,
+    # like the commented header lines and the total number of colors, drop out.
+    color_table = color_lines.str.extract(COLOR_LINE_RE).dropna()
 
-        # Split the line on the # so we have the rgba field and the names field
-        color_line_parts = color_line.split(' # ')
-
-        # Process the RGB field
-        color_rgb = color_line_parts[0]
-
-        # Remove the alpha value of 1.0, we don't need that
-        remove_str = ' 1.000000'
-        if color_rgb.endswith(remove_str):
-            rgb = color_rgb[:-(len(remove_str))]
-
-        # Separate the values with commas
-        #rgb = rgb.replace(' ', ', ')
-
-
-        color_values.append(rgb)
-        color_names.append(color_line_parts[1])
-
-    # expand to at least the total_colors size
-    sized_color_values = color_values * math.ceil(num_colors / len(color_values))
-
-    # trim off the modulus
-    sized_color_values = sized_color_values[:num_colors]
-
-    sized_color_names = color_names * math.ceil(num_colors / len(color_names))
-    sized_color_names = sized_color_names[:num_colors]
-
-    sized_color_index = []
-    for i, value in enumerate(sized_color_names, start=1):
-        sized_color_index.append(i)
-    
+    # Repeat the colors, as many times as needed, to fill exactly num_colors
+    pick = np.arange(num_colors) % len(color_table)
     
-    df = pd.DataFrame(list(zip(sized_color_index, sized_color_values, sized_color_names)), columns =['color_index', 'rgb', 'color_name'])
+    # Build the dataframe straight from the columns, with a 1-based color index
+    df = pd.DataFrame({'color_index': np.arange(1, num_colors + 1, dtype=np.int32), 'rgb': color_table['rgb'].to_numpy()[pick], 'color_name': color_table['color_name'].to_numpy()[pick]})
 
 
     return(df)
@@ -442,54 +452,39 @@ def parse_speck(inpath, data_filter):
     :rtype: tuple of str
     """
     
-    # Open the passed file path
-    with open(inpath, 'rt') as infile:
-
-        # Define some strings. We don't care about the header lines because we reprint them
-        header_lines = str()
-        datavar_lines = str()
-        data_lines = str()
-
-
-        # Cycle through the speck file, line by line, until we're out of lines
-        while True:
-
-            # Read the line from the speck file
-            line = infile.readline()
-
-            # Break once we're out of lines
-            if not line:
-                break
-
-            # If we have a line that begins with a number or a minus number, 
-            # then it's a data line and we add it to the data_lines string
-            if re.match(r'^[0-9]', line) or re.match(r'^-[0-9]', line):
-
-                # Test if there is a criterion passed to the function, 
-                # i.e. only choose lines that contain data_filter string
-                # If we pass the value "None" then we want all lines from the speck
-                if data_filter is None:
-                    data_lines += line
-                
-                # if we pass a value, then we want only the lines it appears in
-                elif data_filter in line:
-                    data_lines += line
-
-                # else, we're hosed with no data lines, should handle all this with exceptions, probably.
-                else:
-                    continue
-
-
-            # Save the datavar lines
-            elif re.match(r'^datavar', line):
-                datavar_lines += line
-
-            # If the line doesn't begin with a number or minus number, 
-            # then it's a header line.
-            else:
-                header_lines += line
+    # Open the passed file path and read all of its lines in one go
+    with open(inpath, 'rt', buffering=1<<20) as infile:
+        lines = infile.readlines()
+
+    # Collect the lines in lists and join them at the end. We don't care about
+    # the header lines because we reprint them
+    header_lines = []
+    datavar_lines = []
+    data_lines = []
+
+    # Cycle through the speck file, line by line
+    for line in lines:
+
+        # If we have a line that begins with a number or a minus number, 
+        # then it's a data line and we add it to the data_lines list
+        if DATA_LINE_RE.match(line):
+
+            # Test if there is a criterion passed to the function, 
+            # i.e. only choose lines that contain data_filter string
+            # If we pass the value "None" then we want all lines from the speck
+            if data_filter is None or data_filter in line:
+                data_lines.append(line)
+
+        # Save the datavar lines
+        elif DATAVAR_LINE_RE.match(line):
+            datavar_lines.append(line)
+
+        # If the line doesn't begin with a number or minus number, 
+        # then it's a header line.
+        else:
+            header_lines.append(line)
 
-    return header_lines, datavar_lines, data_lines
+    return ''.join(header_lines), ''.join(datavar_lines), ''.join(data_lines)
 
 
 
@@ -509,14 +504,13 @@ def parse_lineage_csv(datainfo):
 
     # Open the lineage_codes.csv and look up the code number for the clade
     file_name = 'lineage_codes.csv'
-    lineage_codes_path = Path.cwd() / PROCESSED_DATA_DIRECTORY / datainfo['dir'] / datainfo['catalog_directory'] / file_name
+    lineage_codes_path = BASE_PATH / PROCESSED_DATA_DIRECTORY / datainfo['dir'] / datainfo['catalog_directory'] / file_name
     with open(lineage_codes_path, 'rt') as lineage_codes_file:
         
-        # Read the csv file, and store the rows in a list
-        cin = csv.reader(lineage_codes_file)
-        lineage_key = [tuple(row) for row in cin]
+        # Read the csv file, and store the rows as a tuple of tuples in one pass
+        lineage_key = tuple(map(tuple, csv.reader(lineage_codes_file)))
 
-    return tuple(lineage_key)
+    return lineage_key
 
 
 
@@ -547,8 +541,12 @@ def test_path(path):
     :param path: A python path object to the file in question.
     :type path: path object
     """
+    # Skip the stat if we've already seen this directory
+    if path in _PATH_EXISTS_CACHE:
+        return
+
     # Get a relative path from the project root directory
-    relative_filepath = str(path.relative_to(Path.cwd()))
+    relative_filepath = str(path.relative_to(BASE_PATH))
 
     if not Path.exists(path):
         if CREATE_DIRS_BY_DEFAULT:
@@ -568,15 +566,21 @@ def test_path(path):
     # else:   # debugging purposes
     #     print('Path exists: ' + str(path))
 
+    # The directory exists now, either way
+    _PATH_EXISTS_CACHE.add(path)
+
 
 
 
 
 # -----------------------------------------------------------------------------
+@lru_cache(maxsize=None)
 def file_variable_generator(filename):
     """
     Generate an openspace variable name for the asset scenegraph variable.
 
+    The asset writers ask for the same few names over and over, so results are cached.
+
     :param filename: Name of the file as a char string to be used in constructing a OpenSpace variable name.
     :type filename: str
     :return: Returns a constructed variable name.
@@ -602,23 +606,22 @@ def pre_process_takanori_consensus(datainfo):
 
     # Open the consensus file to transform
     file_name = datainfo['consensus_file']
-    consensus_file_path = Path.cwd() / DATA_DIRECTORY / datainfo['dir'] / datainfo['catalog_directory'] / file_name
+    consensus_file_path = BASE_PATH / DATA_DIRECTORY / datainfo['dir'] / datainfo['catalog_directory'] / file_name
     with open(consensus_file_path, 'rt') as consensus_file:
 
         # Read in the CSV file
         # 'Taxon' header is not present in the CSV, so remove all the headers, and add them manually
-        df = pd.read_csv(consensus_file, header=0, names=['line_num', 'x', 'y', 'z', 'class', 'class_name', 'color', 'genus', 'taxon', 'seqid'])
+        # Only parse the columns we keep, with their types given up front
+        df = pd.read_csv(consensus_file, header=0, names=['line_num', 'x', 'y', 'z', 'class', 'class_name', 'color', 'genus', 'taxon', 'seqid'],
+                         usecols=['taxon', 'x', 'y', 'z'], dtype={'taxon': str, 'x': 'float64', 'y': 'float64', 'z': 'float64'})
 
     
     out_filename = 'consensus_preprocessed_' + datainfo['consensus_file']
-    out_path = Path.cwd() / DATA_DIRECTORY / datainfo['dir'] / datainfo['catalog_directory'] / out_filename
-
+    out_path = BASE_PATH / DATA_DIRECTORY / datainfo['dir'] / datainfo['catalog_directory'] / out_filename
 
-    # Rearrange the columns
-    df_new = df[['taxon', 'x', 'y', 'z']]
 
-
-    df_new.to_csv(out_path, index=False)
+    # Rearrange the columns as we write them
+    df.to_csv(out_path, index=False, columns=['taxon', 'x', 'y', 'z'])
 
     return(out_filename)
 
@@ -636,22 +639,21 @@ def pre_process_takanori_seq(datainfo):
     
     # Open the seq file to transform
     file_name = datainfo['sequence_file']
-    seq_file_path = Path.cwd() / DATA_DIRECTORY / datainfo['dir'] / datainfo['catalog_directory'] / file_name
+    seq_file_path = BASE_PATH / DATA_DIRECTORY / datainfo['dir'] / datainfo['catalog_directory'] / file_name
     with open(seq_file_path, 'rt') as seq_file:
 
         # Read in the CSV file
         # 'Taxon' header is not present in the CSV, so remove all the headers, and add them manually
-        df = pd.read_csv(seq_file, header=0, names=['line_num', 'x', 'y', 'z', 'class', 'class_name', 'color', 'genus', 'taxon', 'seqid'])
+        # Only parse the columns we keep, with their types given up front
+        df = pd.read_csv(seq_file, header=0, names=['line_num', 'x', 'y', 'z', 'class', 'class_name', 'color', 'genus', 'taxon', 'seqid'],
+                         usecols=['seqid', 'x', 'y', 'z'], dtype={'seqid': str, 'x': 'float64', 'y': 'float64', 'z': 'float64'})
 
     
     out_filename = 'sequence_preprocessed_' + datainfo['sequence_file']
-    out_path = Path.cwd() / DATA_DIRECTORY / datainfo['dir'] / datainfo['catalog_directory'] / out_filename
-
-
-    # Rearrange the columns
-    df_new = df[['seqid', 'x', 'y', 'z']]
+    out_path = BASE_PATH / DATA_DIRECTORY / datainfo['dir'] / datainfo['catalog_directory'] / out_filename
 
 
-    df_new.to_csv(out_path, index=False)
+    # Rearrange the columns as we write them
+    df.to_csv(out_path, index=False, columns=['seqid', 'x', 'y', 'z'])
 
     return(out_filename)
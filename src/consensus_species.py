@@ -8,13 +8,76 @@ Consensus species is an average point that represents an entire species' data, s
 This module consists of a data processing function and an asset file creation file.
 '''
 
-import sys
+import os
 import pandas as pd
 from pathlib import Path
+from dataclasses import dataclass, asdict
 
 from src import common
 
 
+@dataclass(slots=True)
+class AssetEntry:
+    """
+    The info needed to write one data file into the consensus species asset file.
+    """
+    csv_file: str
+    csv_var: str
+    asset_rel_path: str
+    os_scenegraph_var: str
+    os_identifier_var: str
+    gui_name: str
+    gui_path: str
+
+
+# The scene graph node written into the asset file for each data file. Filled in
+# from an AssetEntry, so the Lua braces are doubled up.
+SCENEGRAPH_TEMPLATE = '''local {os_scenegraph_var} = {{
+    Identifier = "{os_identifier_var}",
+    Renderable = {{
+        UseCaching = false,
+        Type = "RenderablePointCloud",
+         Coloring = {{
+            FixedColor = {{ 0.8, 0.8, 0.8 }}
+        }},
+        Opacity = 1.0,
+        SizeSettings = {{ ScaleFactor = scale_factor, ScaleExponent = scale_exponent }},
+        File = {csv_var},
+        DataMapping = {{ Name="taxon"}},
+        Labels = {{ Enabled = false, Size = text_size  }},
+        --FadeLabelDistances = {{ 0.0, 0.5 }},
+        --FadeLabelWidths = {{ 0.001, 0.5 }},
+        Unit = "Km",
+        BillboardMinMaxSize = {{ 0.0, 25.0 }},
+        EnablePixelSizeControl = true,
+        EnableLabelFading = false,
+        Enabled = false
+    }},
+    GUI = {{
+        Name = "{gui_name}",
+        Path = "{gui_path}",
+    }}
+}}
+
+'''
+
+
+# The layout of the whole asset file. The per-file sections (resources, scene
+# graph nodes, and the add/remove/export lines) are built up and slotted in.
+ASSET_TEMPLATE = '''-- {project} / {data_group_title}
+-- This file is auto-generated in the {function_name}() function inside {script_name}
+-- Author: Brian Abbott <abbott@amnh.org>
+
+{resources}{settings}
+{scenegraph_nodes}asset.onInitialize(function()
+{add_nodes}end)
+
+asset.onDeinitialize(function()
+{remove_nodes}end)
+
+{exports}'''
+
+
 def process_data(datainfo, vocab):
     """
     Process the consensus species data. 
@@ -44,8 +107,12 @@ def process_data(datainfo, vocab):
 
     common.print_subhead_status('Processing consensus species')
 
+    # Values reused throughout this function
+    sub_lower = datainfo['sub_project'].lower()
+    script_name = Path(__file__).name
+
     datainfo['data_group_title'] = datainfo['sub_project'] + ': Consensus species'
-    datainfo['data_group_desc'] = 'Consensus species for the ' + datainfo['sub_project'].lower() + ' data, which includes one data point per species. This point is an average of the DNA information.'
+    datainfo['data_group_desc'] = 'Consensus species for the ' + sub_lower + ' data, which includes one data point per species. This point is an average of the DNA information.'
     
 
     
@@ -53,59 +120,65 @@ def process_data(datainfo, vocab):
     # ---------------------------------------------------------------------------
     # Example:
     #           .       /       data            /     primates    /     consensus                 / primates.cleaned.species.MDS.euclidean.csv
-    inpath = Path.cwd() / common.DATA_DIRECTORY / datainfo['dir'] / datainfo['catalog_directory'] / datainfo['consensus_file']
+    inpath = common.BASE_PATH / common.DATA_DIRECTORY / datainfo['dir'] / datainfo['catalog_directory'] / datainfo['consensus_file']
     common.test_input_file(inpath)
 
     # Read in the CSV file
     # 'Taxon' header is not present in the CSV, so remove all the headers, and add them manually
-    df = pd.read_csv(inpath, header=0, names=['taxon', 'x', 'y', 'z'])
+    df = pd.read_csv(inpath, header=0, names=['taxon', 'x', 'y', 'z'], dtype={'taxon': str, 'x': 'float64', 'y': 'float64', 'z': 'float64'})
 
     #print(df)
 
-    # Rearrange the columns
-    df = df[['x', 'y', 'z', 'taxon']]
+    # Rescale the position data, all three columns in one multiply
+    df[['x', 'y', 'z']] = df[['x', 'y', 'z']].to_numpy() * common.POSITION_SCALE_FACTOR
 
-    # Rescale the position data
-    df['x'] = df['x'].multiply(common.POSITION_SCALE_FACTOR)
-    df['y'] = df['y'].multiply(common.POSITION_SCALE_FACTOR)
-    df['z'] = df['z'].multiply(common.POSITION_SCALE_FACTOR)
+    # Coalate this DF with the vocabulary DF. Only bring over the columns we keep,
+    # keyed on a shared 'taxon' column, so there's nothing to drop afterwards.
+    # Both keys get the same categorical dtype first, so the join compares
+    # integer codes rather than hashing every name string.
+    names = vocab[['scientific name', 'common name']].rename(columns={'scientific name': 'taxon'})
+    taxon_dtype = pd.CategoricalDtype(pd.Index(df['taxon'].dropna().unique()).union(names['taxon'].dropna().unique()))
+    df['taxon'] = df['taxon'].astype(taxon_dtype)
+    names['taxon'] = names['taxon'].astype(taxon_dtype)
+    df = df.merge(names, on='taxon', how='left', copy=False)
 
-    # Coalate this DF with the vocabulary DF
-    df = pd.merge(df, vocab, left_on='taxon', right_on='scientific name', how='left').drop(['taxId', 'scientific name'], axis=1)
+    # Hand the taxon column back as plain strings, as the sequence lineage merge expects
+    df['taxon'] = df['taxon'].astype(object)
 
     # Print the data in a single CSV file.
     # ---------------------------------------------------------------------------
     out_file_stem = 'consensus'
-    outpath = Path.cwd() / datainfo['dir'] / datainfo['catalog_directory'] / common.CONSENSUS_DIRECTORY
+    outpath = common.BASE_PATH / datainfo['dir'] / datainfo['catalog_directory'] / common.CONSENSUS_DIRECTORY
     common.test_path(outpath)
 
     outfile_csv = out_file_stem + '.csv'
     outpath_csv = outpath / outfile_csv
 
-    with open(outpath_csv, 'w') as csvfile:
+    with open(outpath_csv, 'w', buffering=1<<20) as csvfile:
 
-        header = common.header(datainfo, script_name=Path(__file__).name)
+        header = common.header(datainfo, script_name=script_name)
         print(header, file=csvfile)
         
-        # Print the data to the CSV file. Don't include the index.
+        # Print the data to the CSV file. Don't include the index, and put the
+        # columns in x, y, z, taxon order as we write rather than copying the df.
         # For some reason, we have to include the lineterminator='\n' to get the newlines to work.
         # Without this, newlines default to '\r\r\n', which is particularly bizarre.
-        df.to_csv(csvfile, index=False, lineterminator='\n')
+        df.to_csv(csvfile, index=False, lineterminator='\n', columns=['x', 'y', 'z', 'taxon', 'common name'])
 
         # Report to stdout
         common.out_file_message(outpath_csv)
 
     # Print a log file
     # ---------------------------------------------------------------------------
-    outfile_log = Path(__file__).name + '.log'
+    outfile_log = script_name + '.log'
     
-    log_path = Path.cwd() / common.LOG_DIRECTORY / datainfo['dir'] / datainfo['catalog_directory']
+    log_path = common.BASE_PATH / common.LOG_DIRECTORY / datainfo['dir'] / datainfo['catalog_directory']
     common.test_path(log_path)
     outpath_log = log_path / outfile_log
 
-    with open(outpath_log, 'wt') as log:
+    with open(outpath_log, 'wt', buffering=1<<20) as log:
 
-        print('Generated log from ' + Path(__file__).name + ' run with the ' + datainfo['sub_project'].lower() + ' data set.', file=log)
+        print('Generated log from ' + script_name + ' run with the ' + sub_lower + ' data set.', file=log)
         print('================================================================================', file=log)
 
         # Some general stats, number of rows
@@ -116,11 +189,12 @@ def process_data(datainfo, vocab):
 
         # Print all the column names
         print('Columns:', file=log)
-        print(pd.DataFrame({"column": df.columns, "non-nulls": len(df)-df.isnull().sum().values, "nulls": df.isnull().sum().values, "type": df.dtypes.values}), file=log)
+        nulls = df.isnull().sum().values
+        print(pd.DataFrame({"column": df.columns, "non-nulls": len(df)-nulls, "nulls": nulls, "type": df.dtypes.values}), file=log)
         print(file=log)
 
         # Print the unique values and their count, sorted by the column, not the highest count
-        print(df['taxon'].value_counts().sort_index(), file=log)
+        print(df.groupby('taxon', sort=True).size(), file=log)
         print(file=log)
 
 
@@ -136,6 +210,36 @@ def process_data(datainfo, vocab):
 
 
 
+def _emit_asset(asset_info, datainfo, fh):
+    """
+    Write the consensus species asset file contents to an open file handle.
+
+    :param asset_info: The per-file info gathered in :func:`make_asset`.
+    :type asset_info: list of AssetEntry
+    :param datainfo: Metadata about the dataset.
+    :type datainfo: dict of {str : list}
+    :param fh: The open asset file.
+    :type fh: file object
+    """
+
+    # Render the whole asset file from the template in one go. The per-file
+    # sections are joined up first, then dropped into their slots.
+    fh.write(ASSET_TEMPLATE.format(
+        project=datainfo['project'],
+        data_group_title=datainfo['data_group_title'],
+        function_name=make_asset.__name__,
+        script_name=Path(__file__).name,
+        resources=''.join(f'local {entry.csv_var} = asset.resource("{entry.asset_rel_path}/{entry.csv_file}")\n' for entry in asset_info),
+        settings=common.ASSET_SETTINGS,
+        scenegraph_nodes=''.join(SCENEGRAPH_TEMPLATE.format(**asdict(entry)) for entry in asset_info),
+        add_nodes=''.join(f'    openspace.addSceneGraphNode({entry.os_scenegraph_var})\n' for entry in asset_info),
+        remove_nodes=''.join(f'    openspace.removeSceneGraphNode({entry.os_scenegraph_var})\n' for entry in asset_info),
+        exports=''.join(f'asset.export({entry.os_scenegraph_var})\n' for entry in asset_info),
+    ))
+
+
+
+
 def make_asset(datainfo):
     """
     Generate the asset file for the consensus species data.
@@ -150,120 +254,41 @@ def make_asset(datainfo):
         The asset file containing the OpenSpace configurations for the consensus species.
     """
 
-    # We shift the stdout to our filehandle so that we don't have to keep putting
-    # the filehandle in every print statement.
-    # Save the original stdout so we can switch back later
-    original_stdout = sys.stdout
-
-
+    # Define the main list that will hold all the info needed per file,
+    # as one AssetEntry per file
+    asset_info = []
 
-    # Define the main dict that will hold all the info needed per file
-    # This is a nested dict with the format:
-    #      { path: { root:  , filevar:  , os_variable:  , os_identifier:  , name:  } }
-    asset_info = {}
+    # The consensus directory names the files, variables, and GUI entries below
+    csv_dir = common.CONSENSUS_DIRECTORY
 
     # Gather info about the files
-    # Get a listing of the csv files in the path, then set the dict
-    # values based on the filename.
-    path = Path.cwd() / datainfo['dir'] / datainfo['catalog_directory'] / common.CONSENSUS_DIRECTORY
-    files = sorted(path.glob('*.csv'))
-
-
-    for path in files:
-        
-        file = path.name
-
-        # Set the nested dict
-        asset_info[file] = {}
-
-        asset_info[file]['csv_file'] = path.name
-        asset_info[file]['csv_var'] = common.file_variable_generator(asset_info[file]['csv_file'])
-
-        asset_info[file]['asset_rel_path'] = common.CONSENSUS_DIRECTORY
-
-        asset_info[file]['os_scenegraph_var'] = datainfo['dir'] + '_' + datainfo['catalog_directory'] + '_' + common.CONSENSUS_DIRECTORY
-        asset_info[file]['os_identifier_var'] = datainfo['dir'] + '_' + datainfo['catalog_directory'] + '_' + common.CONSENSUS_DIRECTORY
-
-        asset_info[file]['gui_name'] = common.CONSENSUS_DIRECTORY.replace('_', ' ').title()
-        asset_info[file]['gui_path'] = '/' + datainfo['sub_project'] + '/' + datainfo['catalog_directory']
-
-    # Open the file to write to
-    outfile = common.CONSENSUS_DIRECTORY + '.asset'
-    outpath = Path.cwd() / datainfo['dir'] / datainfo['catalog_directory'] / outfile
-    with open(outpath, 'wt') as asset:
-
-        # Switch stdout to the file
-        sys.stdout = asset
-
-        print('-- ' + datainfo['project'] + ' / ' + datainfo['data_group_title'])
-        print("-- This file is auto-generated in the " + make_asset.__name__ + "() function inside " + Path(__file__).name)
-        print('-- Author: Brian Abbott <abbott@amnh.org>')
-        print()
-
-        for file in asset_info:
-            print('local ' + asset_info[file]['csv_var'] + ' = asset.resource("' + asset_info[file]['asset_rel_path'] + '/' + asset_info[file]['csv_file'] + '")')
-
-        print('-- Set some parameters for OpenSpace settings')
-        print('local scale_factor = ' + common.POINT_SCALE_FACTOR)
-        print('local scale_exponent = ' + common.POINT_SCALE_EXPONENT)
-        print('local text_size = ' + common.TEXT_SIZE)
-        print('local text_min_size = ' + common.TEXT_MIN_SIZE)
-        print('local text_max_size = ' + common.TEXT_MAX_SIZE)
-        print()
-
-        for file in asset_info:
-
-            print('local ' + asset_info[file]['os_scenegraph_var'] + ' = {')
-            print('    Identifier = "' + asset_info[file]['os_identifier_var'] + '",')
-            print('    Renderable = {')
-            print('        UseCaching = false,')
-            print('        Type = "RenderablePointCloud",')
-            print('         Coloring = {')
-            print('            FixedColor = { 0.8, 0.8, 0.8 }')
-            print('        },')
-            print('        Opacity = 1.0,')
-            print('        SizeSettings = { ScaleFactor = scale_factor, ScaleExponent = scale_exponent },')
-            print('        File = ' + asset_info[file]['csv_var'] + ',')
-            print('        DataMapping = { Name="taxon"},')
-            print('        Labels = { Enabled = false, Size = text_size  },')
-            print('        --FadeLabelDistances = { 0.0, 0.5 },')
-            print('        --FadeLabelWidths = { 0.001, 0.5 },')
-            print('        Unit = "Km",')
-            print('        BillboardMinMaxSize = { 0.0, 25.0 },')
-            print('        EnablePixelSizeControl = true,')
-            print('        EnableLabelFading = false,')
-            print('        Enabled = false')
-            print('    },')
-            print('    GUI = {')
-            print('        Name = "' + asset_info[file]['gui_name'] + '",')
-            print('        Path = "' + asset_info[file]['gui_path'] + '",')
-            print('    }')
-            print('}')
-            print()
-
-
-
-        print('asset.onInitialize(function()')
-        for file in asset_info:
-            print('    openspace.addSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')')
-
-        print('end)')
-        print()
-
-
-        print('asset.onDeinitialize(function()')
-        for file in asset_info:
-            print('    openspace.removeSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')')
-        
-        print('end)')
-        print()
-
-
-        for file in asset_info:
-            print('asset.export(' + asset_info[file]['os_scenegraph_var'] + ')')
-
-    # Switch the stdout back to normal stdout (screen)
-    sys.stdout = original_stdout
+    # Get a listing of the csv files in the path, then set the entry
+    # values based on the filename. scandir hands back the names straight
+    # from the directory listing, without building and stat-ing a Path per entry.
+    path = common.BASE_PATH / datainfo['dir'] / datainfo['catalog_directory'] / csv_dir
+    with os.scandir(path) as entries:
+        files = sorted(entry.name for entry in entries if entry.name.endswith('.csv'))
+
+
+    for file in files:
+
+        asset_info.append(AssetEntry(
+            csv_file=file,
+            csv_var=common.file_variable_generator(file),
+            asset_rel_path=csv_dir,
+            os_scenegraph_var=datainfo['dir'] + '_' + datainfo['catalog_directory'] + '_' + csv_dir,
+            os_identifier_var=datainfo['dir'] + '_' + datainfo['catalog_directory'] + '_' + csv_dir,
+            gui_name=csv_dir.replace('_', ' ').title(),
+            gui_path='/' + datainfo['sub_project'] + '/' + datainfo['catalog_directory'],
+        ))
+
+    # Set the file to write to
+    outfile = csv_dir + '.asset'
+    outpath = common.BASE_PATH / datainfo['dir'] / datainfo['catalog_directory'] / outfile
+
+    # Open the file and write the asset
+    with open(outpath, 'wt', buffering=1<<20) as asset:
+        _emit_asset(asset_info, datainfo, asset)
 
  
     # Report to stdout
@@ -6,14 +6,133 @@
 Process *Homo sapiens* DNA data with origin information, assign integer codes to use in OpenSpace, and generate OpenSpace data and asset files.
 """
 
-import re
 import sys
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
 from src import common
 
 
+# Set up an integer code for each continient. This is mainly for the .dat
+# printout of the codes.
+CONTINENT_CODES = {'Africa': 1, 'Europe': 2, 'Asia': 3, 'Americas': 4, 'Oceania': 5}
+
+# Manually assign the region codes, in code order. We do not want consecutive codes,
+# rather, we want to assign codes that signify each continent, so Africa is 1x, 
+# Europe is 2x, Asia is 3x, and so on.
+REGION_CODES = {
+    'Central Africa': 10,
+    'South Africa': 11,
+    'West Africa': 12,
+    'North Africa': 13,
+    'Europe': 20,
+    'Western Asia': 30,
+    'Northeast Asia': 31,
+    'Central Asia': 32,
+    'South Asia': 33,
+    'East Asia': 34,
+    'Southeast Asia': 35,
+    'North America': 40,
+    'Central America': 41,
+    'South America': 42,
+    'Oceania': 50,
+}
+
+# To match the continent codes to the main df (sequence) we need to assign a code to each region.
+# A region gets the code of the first continent name found in it, so a region we don't
+# have a region code for (e.g., "East Africa") still lands on the right continent.
+CONTINENT_NAME_CODES = (('Africa', 1), ('Europe', 2), ('Asia', 3), ('America', 4), ('Oceania', 5))
+
+
+# The layout of the human origins asset files. The per-file sections (resources,
+# scene graph nodes, and the add/remove/export lines) are built up and slotted in.
+ASSET_TEMPLATE = '''-- {project} / {data_group_title}
+-- This file is auto-generated in the {function_name}() function inside {script_name}
+-- Author: Brian Abbott <abbott@amnh.org>
+
+{resources}-- Set some parameters for OpenSpace settings
+local point_scale_factor = {point_scale_factor}
+local point_scale_exponent = {point_scale_exponent}
+local text_size = {text_size}
+local text_min_size = {text_min_size}
+local text_max_size = {text_max_size}
+
+{scenegraph_nodes}asset.onInitialize(function()
+{add_nodes}end)
+
+asset.onDeinitialize(function()
+{remove_nodes}end)
+
+{exports}'''
+
+# The scene graph node for the all-continents data file, filled in from its
+# asset_info entry, so the Lua braces are doubled up.
+ALL_SCENEGRAPH_TEMPLATE = '''local {os_scenegraph_var} = {{
+    Identifier = "{os_identifier_var}",
+    Renderable = {{
+        UseCaching = false,
+        Type = "RenderablePointCloud",
+        Coloring = {{
+            ColorMapping = {{
+                File = asset.resource({cmap_var}),
+                ParameterOptions = {{
+                    {{ Key = "continent_code", Range = {{ 1, 5 }} }},
+                }}
+            }},
+        }},
+        Opacity = 1.0,
+        SizeSettings = {{ ScaleFactor = point_scale_factor, ScaleExponent = point_scale_exponent }},
+        File = {speck_var},
+        Labels = {{ Enabled = false, Size = text_size  }},
+        LabelFile = {label_var},
+        TextColor = {{ 1.0, 1.0, 1.0 }},
+        TextSize = text_size,
+        TextMinMaxSize = {{ text_min_size, text_max_size }},
+        --FadeLabelDistances = {{ 0.0, 0.5 }},
+        --FadeLabelWidths = {{ 0.001, 0.5 }},
+        Unit = "Km",
+        BillboardMinMaxSize = {{ 0.0, 25.0 }},
+        EnablePixelSizeControl = true,
+        EnableLabelFading = false,
+        Enabled = false
+    }},
+    GUI = {{
+        Name = "{gui_name}",
+        Path = "{gui_path}",
+    }}
+}}
+
+'''
+
+# The scene graph node for each region data file, filled in from its asset_info entry.
+REGION_SCENEGRAPH_TEMPLATE = '''local {os_scenegraph_var} = {{
+    Identifier = "{os_identifier_var}",
+    Renderable = {{
+        UseCaching = false,
+        Type = "RenderablePointCloud",
+         Coloring = {{
+            FixedColor = {{ {rgb} }},\t-- {color_name}
+        }},
+        Opacity = 1.0,
+        SizeSettings = {{ ScaleFactor = point_scale_factor, ScaleExponent = point_scale_exponent }},
+        File = {speck_var},
+        DrawLabels = false,
+        Unit = "Km",
+        BillboardMinMaxSize = {{ 0.0, 25.0 }},
+        EnablePixelSizeControl = true,
+        EnableLabelFading = false,
+        Enabled = false
+    }},
+    GUI = {{
+        Name = "{gui_name}",
+        Path = "{gui_path}",
+    }}
+}}
+
+'''
+
+
 def seq_populations(datainfo):
     """
     Process the human DNA data with origin information.
@@ -91,112 +210,66 @@ def seq_populations(datainfo):
     datainfo['data_group_title'] = datainfo['sub_project'] + ': Human DNA origins'
     datainfo['data_group_desc'] = 'DNA data for Homo sapiens plotted by origin information.'
 
+    # The header is the same for every output file, so build it once
+    header = common.header(datainfo, script_name=Path(__file__).name)
+
+    # The output directories for the OpenSpace files, set and checked once
+    project_root = common.BASE_PATH / datainfo['dir']
+    regions_root = project_root / common.REGIONS_DIRECTORY
+    common.test_path(project_root)
+    common.test_path(regions_root)
+
 
     # Read the sequence file and process into a dataframe
     # ---------------------------------------------------------------------------
-    inpath = Path.cwd() / common.DATA_DIRECTORY / datainfo['dir'] / datainfo['catalog_directory'] / datainfo['sequence_file']
+    inpath = common.BASE_PATH / common.DATA_DIRECTORY / datainfo['dir'] / datainfo['catalog_directory'] / datainfo['sequence_file']
     common.test_input_file(inpath)
 
-    df = pd.read_csv(inpath)
+    # Read just the columns we use, with their types set up front
+    df = pd.read_csv(inpath, usecols=['seqId', 'x', 'y', 'z', 'population', 'region'], dtype={'seqId': str, 'x': 'float64', 'y': 'float64', 'z': 'float64', 'population': str, 'region': str})
 
 
 
-    # Get rid of the "East Asia - tentative" region, and just call it "East Asia"
-    df.loc[df['region'] == 'East Asia - tentative', 'region'] = 'East Asia'
-
+    # Get rid of the "East Asia - tentative" region, and just call it "East Asia".
     # Similarly, rename North-East Asia to Northeast Asia, and for South.
-    df.loc[df['region'] == 'North-East Asia', 'region'] = 'Northeast Asia'
-    df.loc[df['region'] == 'South-East Asia', 'region'] = 'Southeast Asia'
+    # One replace scans the column once for all three.
+    df['region'] = df['region'].replace({'East Asia - tentative': 'East Asia', 'North-East Asia': 'Northeast Asia', 'South-East Asia': 'Southeast Asia'})
+
+    # There are only a handful of regions, so hold them as a categorical. The
+    # maps and groupbys below then work on the categories rather than every row.
+    df['region'] = df['region'].astype('category')
     
 
     # Process the regions and assign a integer code to each region and for each continent
     # ---------------------------------------------------------------------------
-    # Set up unique list of regions
-    region_list = list(df['region'].unique())
-
-
-    # Set up an integer code for each continient
-    # First, set up a generic dictionary to house the continents. This is mainly
-    # for the .dat printout we do at the end.
-    continent_codes = {'Africa': 1, 'Europe': 2, 'Asia': 3, 'Americas': 4, 'Oceania': 5}
+    # Set up the unique regions. The categories are exactly the regions in the data.
+    region_set = set(df['region'].cat.categories)
 
+    # Flag any region we don't have a code for
+    for region in sorted(region_set - REGION_CODES.keys()):
+        print('Unrecognized region name: ' + region)
 
-    # To match the continent codes to the main df (sequence) we need to assign a code to each region,
-    # which is what this dictionary does.
+    # Assign the continent code for each region from the continent name within it
     regional_continent_codes = {}
-
-    for region in region_list:
-        if re.search('Africa', region):
-            regional_continent_codes.update({region: 1})
-        elif re.search('Europe', region):
-            regional_continent_codes.update({region: 2})
-        elif re.search('Asia', region):
-            regional_continent_codes.update({region: 3})
-        elif re.search('America', region):
-            regional_continent_codes.update({region: 4})
-        elif re.search('Oceania', region):
-            regional_continent_codes.update({region: 5})
+    for region in region_set:
+        continent_code = next((code for name, code in CONTINENT_NAME_CODES if name in region), None)
+        if continent_code is None:
+            print('Unrecognized continent among region names: ' + region)
         else:
-            print('Unrecognized continent among region names.')
+            regional_continent_codes[region] = continent_code
 
 
-    # Add the integer value of the continent to a new column in the df
-    # by mapping the dictionary defined above to the "region" column in the dataframe.
-    df['continent_code'] = df['region'].map(regional_continent_codes)
+    # The region codes for just the regions in these data. REGION_CODES is already
+    # in region code order, so there's nothing to sort.
+    region_codes = {region: code for region, code in REGION_CODES.items() if region in region_set}
 
 
-        
-
-    # Define a dictionary for the regions and their codes format {region: region_code}
-    region_codes = {}
-    
-    # Manually assign the codes. This is sloppy, but we do not want consecutive codes,
-    # rather, we want to assign codes that signify each continent, so Africa is 1x, 
-    # Europe is 2x, Asia is 3x, and so on.
-    for region in region_list:
-        if region == 'Central Africa':
-            region_codes.update({region: 10})
-        elif region == 'South Africa':
-            region_codes.update({region: 11})
-        elif region == 'West Africa':
-            region_codes.update({region: 12})
-        elif region == 'North Africa':
-            region_codes.update({region: 13})
-        elif region == 'Europe':
-            region_codes.update({region: 20})
-        elif region == 'Western Asia':
-            region_codes.update({region: 30})
-        elif region == 'Northeast Asia':
-            region_codes.update({region: 31})
-        elif region == 'Central Asia':
-            region_codes.update({region: 32})
-        elif region == 'South Asia':
-            region_codes.update({region: 33})
-        elif region == 'East Asia':
-            region_codes.update({region: 34})
-        elif region == 'Southeast Asia':
-            region_codes.update({region: 35})
-        elif region == 'North America':
-            region_codes.update({region: 40})
-        elif region == 'Central America':
-            region_codes.update({region: 41})
-        elif region == 'South America':
-            region_codes.update({region: 42})
-        elif region == 'Oceania':
-            region_codes.update({region: 50})
-        else:
-            print('Unrecognized region name')
-    
-
-    # Sort the dict by region code
-    region_codes = dict(sorted(region_codes.items(), key = lambda x: x[1]))
-
-
-
-
-    # Add the integer value of the region to a new column in the df
-    # by mapping the dictionary defined above to the "region" column in the dataframe.
-    df['region_code'] = df['region'].map(region_codes)
+    # Add the integer value of the continent and the region to new columns in the df
+    # by mapping the dictionaries defined above to the "region" column in the dataframe.
+    # The map only looks up each category once, and np.asarray hands back plain
+    # integer columns rather than categoricals.
+    df['continent_code'] = np.asarray(df['region'].map(regional_continent_codes))
+    df['region_code'] = np.asarray(df['region'].map(region_codes))
 
     
 
@@ -204,69 +277,49 @@ def seq_populations(datainfo):
     # Process the populations and assign a integer code to each
     # ---------------------------------------------------------------------------
     # A dictionary for the pop codes, format {population_name: population_code}
-    population_codes = {}
-
-    # Group the dataframe by region code and population
-    grp = df.groupby(['region_code', 'population'])
-
-    # Set up a loop to assign the codes to each population name
-    # Region codes begin at 10, so we'll enter the loop with that value
-    region_code = 10
-
-    # Start our pop_counter to 1
-    pop_counter = 1
+    # Take each unique (region code, population) pair, in region code order
+    pop_keys = df[['region_code', 'population']].dropna().drop_duplicates().sort_values(['region_code', 'population'])
 
-    # Loop through the group df. Each key is a tuple of region code (key[0]) and pop name (key[1])
-    for key, value in grp:
+    # Number the populations within each region from 1, so the counter restarts
+    # at every new region code.
+    pop_counter = pop_keys.groupby('region_code').cumcount() + 1
 
-        # If the region code does not equal that of the current iteration, 
-        # then reset the pop_counter counter back to 1. This means we're on 
-        # a new region and want to start counting our populations from 1 again.
-        if region_code != key[0]:
-            pop_counter = 1
-        
-
-        # Construct the population_code value. This is a combo of the region code and the pop_counter
-        population_code = str(key[0]) + f"{pop_counter:02}"
+    # The counter only has two digits in the code, so a region with 100 or more
+    # populations would run into the next region's codes.
+    if len(pop_counter) and (pop_counter.max() >= 100):
+        sys.exit(f"{seq_populations.__name__}() function inside {Path(__file__).name}:\nA region has {pop_counter.max()} populations, but population codes only allow 99 per region.\nQuitting...")
 
-        # Write the values to the populations dictionary
-        population_codes.update({key[1]: population_code})
-
-        # Set values for the next iteration
-        region_code = key[0]
-        pop_counter += 1
+    # Construct the population_code value. This is a combo of the region code and the
+    # two-digit pop_counter, so region 10's third population is 1003.
+    population_codes = dict(zip(pop_keys['population'], pop_keys['region_code'] * 100 + pop_counter))
 
     
     # Add the integer value of the population to a new column in the main df
     # by mapping the dictionary defined above to the "population" column.
     df['population_code'] = df['population'].map(population_codes)
 
-    
-    # Find the average position in x,y,z
-    x_avg = df['x'].mean()
-    y_avg = df['y'].mean()
-    z_avg = df['z'].mean()
-
-
-    # Normalize the positions to the average
-    df['x'] = df['x'].subtract(x_avg)
-    df['y'] = df['y'].subtract(y_avg)
-    df['z'] = df['z'].subtract(z_avg)
-
+    # A region or population without a code gets a code of 0, so every row has a
+    # number OpenSpace can read in the speck file. The codes are all small, so
+    # hold them in small integer columns.
+    code_columns = ['continent_code', 'region_code', 'population_code']
+    df[code_columns] = df[code_columns].fillna(0)
+    df = df.astype({'continent_code': 'int8', 'region_code': 'int16', 'population_code': 'int16'}, copy=False)
 
-    # Rescale the position data
-    df['x'] = df['x'].multiply(common.HUMAN_POSITION_SCALE_FACTOR)
-    df['y'] = df['y'].multiply(common.HUMAN_POSITION_SCALE_FACTOR)
-    df['z'] = df['z'].multiply(common.HUMAN_POSITION_SCALE_FACTOR)
+    
+    # Normalize the positions to the average x,y,z, then rescale the position data.
+    # Work on all three columns at once, in place on one float array. nanmean skips
+    # missing values, as the pandas column means did.
+    xyz = df[['x', 'y', 'z']].to_numpy(dtype='float64', copy=True)
+    xyz -= np.nanmean(xyz, axis=0)
+    xyz *= common.HUMAN_POSITION_SCALE_FACTOR
+    df[['x', 'y', 'z']] = xyz
     
 
 
-    # Build a label format for the speck file
+    # Build a label format for the speck file, joining the three columns in one pass.
+    # A missing part shows up as nan rather than blanking out the whole name.
     sep = ' | '
-    df['speck_name'] = df['seqId'] + sep + df['region'] + sep + df['population']
-
-    # Sort the df by region code, this makes things easier down the line.
-    df.sort_values(by=['region_code'])
+    df['speck_name'] = df['seqId'].str.cat([df['region'].astype(object), df['population']], sep=sep, na_rep='nan')
 
 
 
@@ -274,40 +327,29 @@ def seq_populations(datainfo):
 
     # Print the region codes and population codes to a separate file for reference.
     # ---------------------------------------------------------------------------
-    # This is the root path for all output files in this script,
-    # so only need to set and check it once.
-    outpath = Path.cwd() / common.PROCESSED_DATA_DIRECTORY / datainfo['dir']
+    outpath = common.BASE_PATH / common.PROCESSED_DATA_DIRECTORY / datainfo['dir']
     common.test_path(outpath)
 
     outfile_codes_dat = 'region_population_code_key.dat'
     outpath_codes_dat = outpath / outfile_codes_dat
 
-    with open(outpath_codes_dat, 'wt') as dat_codes:
-
-        print('Generated from ' + Path(__file__).name + '.\n', file=dat_codes)
-
-        # Print the continent codes
-        print('Continent codes:', file=dat_codes)
-
-        for continent_name, continent_code in continent_codes.items():
-            print(f"    {continent_code} = {continent_name}", file=dat_codes)
-
-
-
-        # Print the codes info to the file.
-        print('\n\nRegion codes:', file=dat_codes)
+    # Collect the lines of the codes file, then write them in one go
+    dat_lines = ['Generated from ' + Path(__file__).name + '.\n\n']
 
-        # Run thru the region codes dict
-        for region_name, region_code in region_codes.items():
-            print(f"    {region_code} = {region_name}", file=dat_codes)
+    # Print the continent codes
+    dat_lines.append('Continent codes:\n')
+    dat_lines.extend(f"    {continent_code} = {continent_name}\n" for continent_name, continent_code in CONTINENT_CODES.items())
 
+    # Print the codes info to the file.
+    dat_lines.append('\n\nRegion codes:\n')
+    dat_lines.extend(f"    {region_code} = {region_name}\n" for region_name, region_code in region_codes.items())
 
-        # Print the population codes
-        print('\n\nPopulation codes:', file=dat_codes)
+    # Print the population codes
+    dat_lines.append('\n\nPopulation codes:\n')
+    dat_lines.extend(f"    {pop_code} = {pop_name}\n" for pop_name, pop_code in population_codes.items())
 
-        # Run thru the pop codes dict
-        for pop_name, pop_code in population_codes.items():
-            print(f"    {pop_code} = {pop_name}", file=dat_codes)
+    with open(outpath_codes_dat, 'wt', buffering=1<<20) as dat_codes:
+        dat_codes.write(''.join(dat_lines))
 
 
     # Report to stdout
@@ -320,29 +362,30 @@ def seq_populations(datainfo):
     # Set up the columns to print to datavars
     cols_to_print = ['continent_code', 'region_code', 'population_code']
 
+    # The header and datavar lines are the same for the main speck file and
+    # every region speck file, so build them once
+    speck_prelude = header + '\n' + ''.join('datavar ' + str(i) + ' ' + col + '\n' for i, col in enumerate(cols_to_print))
 
-    outpath = Path.cwd() / datainfo['dir']
-    #print(outpath)
-    common.test_path(outpath)
+    # Build the speck rows a column at a time, rather than row by row. These are
+    # shared by the main speck file and the per-region speck files.
+    # Start with the x,y,z, formatted in one pass over all three columns
+    coords = np.char.mod('%.8f', df[['x', 'y', 'z']].to_numpy())
+    speck_rows = pd.Series(coords.tolist(), index=df.index).str.join(' ')
 
-    outfile_speck = datainfo['dir'] + '.speck'
-    outpath_speck = outpath / outfile_speck
+    # Add the datavar columns, then the speck label commented at the end of the line
+    for col in cols_to_print:
+        speck_rows = speck_rows + ' ' + df[col].astype(str)
 
-    with open(outpath_speck, 'wt') as speck:
+    # A row with no speck name still gets written, labelled nan as before.
+    speck_rows = speck_rows + ' # ' + df['speck_name'].fillna('nan') + '\n'
 
-        header = common.header(datainfo, script_name=Path(__file__).name)
-        print(header, file=speck)
 
-        # set a counter for the datavar number, and cycle through the
-        # columns to print list and print the datavar lines
-        datavar_counter = 0
-        for col in cols_to_print:
-            print('datavar ' + str(datavar_counter) + ' ' + col, file=speck)
-            datavar_counter += 1
-        
-        # Print the rows to the speck file
-        for col, row in df.iterrows():
-            print(f"{row['x']:.8f} {row['y']:.8f} {row['z']:.8f} {row['continent_code']} {row['region_code']} {row['population_code']} # {row['speck_name']}", file=speck)
+    outfile_speck = datainfo['dir'] + '.speck'
+    outpath_speck = project_root / outfile_speck
+
+    # Print the header and datavars, then the rows to the speck file, in one write
+    with open(outpath_speck, 'wt', buffering=1<<20) as speck:
+        speck.write(speck_prelude + ''.join(speck_rows))
 
     # Report to stdout
     common.out_file_message(outpath_speck)
@@ -352,6 +395,9 @@ def seq_populations(datainfo):
 
     # Print a speck file for each region
     # ---------------------------------------------------------------------------
+    # Partition the speck rows by region in one pass, rather than scanning
+    # the whole df once per region
+    region_rows = speck_rows.groupby(df['region'], observed=True, sort=False)
 
     # Cycle through the dictionary of regions
     for region_name, region_code in region_codes.items():
@@ -359,31 +405,11 @@ def seq_populations(datainfo):
         # Make a variable/filename-ready version of the region name
         region_name_var = region_name.lower().replace(' ', '_').replace('-', '_')
 
-        outpath = Path.cwd() / datainfo['dir'] / common.REGIONS_DIRECTORY
-        common.test_path(outpath)
-
         outfile_speck = str(region_code) + '_' + region_name_var + '.speck'
-        outpath_speck = outpath / outfile_speck
-
-        with open(outpath_speck, 'wt') as speck:
+        outpath_speck = regions_root / outfile_speck
 
-            header = common.header(datainfo, script_name=Path(__file__).name)
-            print(header, file=speck)
-
-            # set a counter for the datavar number, and cycle through the
-            # columns to print list and print the datavar lines
-            datavar_counter = 0
-            for col in cols_to_print:
-                print('datavar ' + str(datavar_counter) + ' ' + col, file=speck)
-                datavar_counter += 1
-            
-            # Print the rows to the speck file, but only print rows if the region name
-            # in the dataframe matches that of the loop we're in.
-            ################# HH             row = df.loc[df[lineage_code_col]==code].iloc[0]
-
-            for col, row in df.iterrows():
-                if row['region'] == region_name:
-                    print(f"{row['x']:.8f} {row['y']:.8f} {row['z']:.8f} {row['continent_code']} {row['region_code']} {row['population_code']} # {row['speck_name']}", file=speck)
+        with open(outpath_speck, 'wt', buffering=1<<20) as speck:
+            speck.write(speck_prelude + ''.join(region_rows.get_group(region_name)))
 
         # Report to stdout
         common.out_file_message(outpath_speck)
@@ -400,41 +426,21 @@ def seq_populations(datainfo):
 
     # First, we must build some labels for a label file. This will be from the 
     # average x,y,z for each region
-    # Group by region
-    region_grouped = df.groupby('region')
-
-    # Take the mean x,y,z of each region
-    mean_x = region_grouped['x'].mean()
-    mean_y = region_grouped['y'].mean()
-    mean_z = region_grouped['z'].mean()
-
-    # Concatinate each of these series into a df
-    mean_positions = pd.concat([mean_x, mean_y, mean_z], axis=1)
-
-    # Rename the columns
-    mean_positions.columns = ['mean_x', 'mean_y', 'mean_z']
-
-    # Pull the row index (which is the region) and make it a separate column
-    mean_positions.reset_index(inplace=True)
+    # Group by region and take the mean x,y,z of each region in one pass, then
+    # pull the row index (which is the region) out into a separate column
+    mean_positions = df.groupby('region', observed=True)[['x', 'y', 'z']].mean().rename(columns={'x': 'mean_x', 'y': 'mean_y', 'z': 'mean_z'}).reset_index()
 
 
     # Open and print the labels to a file
-    outpath = Path.cwd() / datainfo['dir']
-    common.test_path(outpath)
-
     outfile_label = datainfo['dir'] + '.label'  
-    outpath_label = outpath / outfile_label
-
-    with open(outpath_label, 'wt') as label:
+    outpath_label = project_root / outfile_label
 
-        header = common.header(datainfo, script_name=Path(__file__).name)
-        print(header, file=label)
+    # Build the label lines, then print the header, text color command and labels in one write
+    coords = np.char.mod('%.8f', mean_positions[['mean_x', 'mean_y', 'mean_z']].to_numpy())
+    label_rows = pd.Series(coords.tolist(), index=mean_positions.index).str.join(' ') + ' text ' + mean_positions['region'].astype(object) + '\n'
 
-        # Print the label file
-        print('textcolor 1', file=label)
-
-        for col, row in mean_positions.iterrows():
-            print(f"{row['mean_x']:.8f} {row['mean_y']:.8f} {row['mean_z']:.8f} text {row['region']}", file=label)
+    with open(outpath_label, 'wt', buffering=1<<20) as label:
+        label.write(header + '\ntextcolor 1\n' + ''.join(label_rows))
 
     # Report to stdout
     common.out_file_message(outpath_label)
@@ -452,37 +458,14 @@ def seq_populations(datainfo):
     color_table = ('Red-Orange', 'Goldenrod', 'Green', 'Magenta', 'Pacific Blue')
 
     # get a list of the continent names
-    continent_list = list(continent_codes.keys())
+    continent_list = list(CONTINENT_CODES.keys())
 
-    # Specify the color table we want to sample from
-    color_table_file = 'crayola.dat'
+    # Look up the color table we want to sample from once, for both color map files
+    crayola_colors = common.read_color_table('crayola.dat')
 
 
-    outpath = Path.cwd() / datainfo['dir']
-    common.test_path(outpath)
-
-    outfile_cmap = 'continents.cmap'
-    outpath_cmap = outpath / outfile_cmap
-
-    with open(outpath_cmap, 'wt') as cmap:
-
-        header = common.header(datainfo, script_name=Path(__file__).name)
-        print(header, file=cmap)
-
-        # Print the number of colors
-        print(len(color_table), file=cmap)
-        
-        # Print the rows to the cmap file
-        for continent_name, color_name in zip(continent_list, color_table):
-
-            # Get the RGB from the color table file given the color name
-            rgb = common.find_color(color_table_file, color_name)
-
-            # Print to the file
-            print(f"{rgb} 1.0 # {color_name} | {continent_name}", file=cmap)
-
-    # Report to stdout
-    common.out_file_message(outpath_cmap)
+    outpath_cmap = project_root / 'continents.cmap'
+    _write_cmap(outpath_cmap, header, continent_list, color_table, crayola_colors)
 
 
 
@@ -500,35 +483,40 @@ def seq_populations(datainfo):
     # get a list of the continent names
     region_list = list(region_codes.keys())
 
-    # Specify the color table we want to sample from
-    color_table_file = 'crayola.dat'
+    outpath_cmap = regions_root / 'regions.cmap'
+    _write_cmap(outpath_cmap, header, region_list, color_table, crayola_colors)
 
 
-    outpath = Path.cwd() / datainfo['dir'] / common.REGIONS_DIRECTORY
-    common.test_path(outpath)
 
-    outfile_cmap = 'regions.cmap'
-    outpath_cmap = outpath / outfile_cmap
 
-    with open(outpath_cmap, 'wt') as cmap:
 
-        header = common.header(datainfo, script_name=Path(__file__).name)
-        print(header, file=cmap)
 
-        # Print the number of colors
-        print(len(color_table), file=cmap)
-        
-        # Print the rows to the cmap file
-        for region_name, color_name in zip(region_list, color_table):
 
-            # Get the RGB from the color table file given the color name
-            rgb = common.find_color(color_table_file, color_name)
+def _write_cmap(outpath, header, names, color_names, color_table):
+    """
+    Print a color map file, one color per name, and report it to stdout.
+
+    :param outpath: Path of the color map file to write.
+    :type outpath: pathlib.Path
+    :param header: The file header.
+    :type header: str
+    :param names: The names to color, e.g. continent or region names.
+    :type names: list of str
+    :param color_names: The color names to use, in the same order as ``names``.
+    :type color_names: tuple of str
+    :param color_table: A color table of {color_name: rgb}, from :func:`common.read_color_table`.
+    :type color_table: dict
+    """
 
-            # Print to the file
-            print(f"{rgb} 1.0 # {color_name} | {region_name}", file=cmap)
+    # The header, the number of colors, then the RGB for each name
+    cmap_lines = [header + '\n', f"{len(color_names)}\n"]
+    cmap_lines.extend(f"{color_table[color_name]} 1.0 # {color_name} | {name}\n" for name, color_name in zip(names, color_names))
+
+    with open(outpath, 'wt') as cmap:
+        cmap.write(''.join(cmap_lines))
 
     # Report to stdout
-    common.out_file_message(outpath_cmap)
+    common.out_file_message(outpath)
 
 
 
@@ -544,12 +532,6 @@ def make_asset_all(datainfo):
     :type datainfo: dict of {str : list}
     """
 
-    # We shift the stdout to our filehandle so that we don't have to keep putting
-    # the filehandle in every print statement.
-    # Save the original stdout so we can switch back later
-    original_stdout = sys.stdout
-
-
     # Define the main dict that will hold all the info needed per file
     # This is a nested dict with the format:
     #      { path: { root:  , filevar:  , os_variable:  , os_identifier:  , name:  } }
@@ -561,135 +543,61 @@ def make_asset_all(datainfo):
     path = Path.cwd() / datainfo['dir']
     files = sorted(path.glob('*.speck'))
 
+    # These are the same for every file, so set them once
+    cmap_file = 'continents.cmap'
+    cmap_var = common.file_variable_generator(cmap_file)
+    os_var = datainfo['dir'] + '_' + 'all'
+    gui_path = '/' + datainfo['sub_project']
+
 
     for path in files:
         
         file = path.name
 
-        # Set the nested dict
-        asset_info[file] = {}
+        # Set the nested dict, and fill it through a local name
+        info = asset_info[file] = {}
 
-        asset_info[file]['speck_file'] = path.name
-        #print(asset_info[file]['speck_file'], path, path.name)
-        asset_info[file]['speck_var'] = common.file_variable_generator(asset_info[file]['speck_file'])
+        info['speck_file'] = file
+        info['speck_var'] = common.file_variable_generator(file)
 
-        asset_info[file]['label_file'] = path.stem + '.label'
-        asset_info[file]['label_var'] = common.file_variable_generator(asset_info[file]['label_file'])
+        info['label_file'] = path.stem + '.label'
+        info['label_var'] = common.file_variable_generator(info['label_file'])
 
-        asset_info[file]['cmap_file'] = 'continents.cmap'
-        asset_info[file]['cmap_var'] = common.file_variable_generator(asset_info[file]['cmap_file'])
+        info['cmap_file'] = cmap_file
+        info['cmap_var'] = cmap_var
         
-        asset_info[file]['asset_rel_path'] = '.'
+        info['asset_rel_path'] = '.'
 
-        asset_info[file]['os_scenegraph_var'] = datainfo['dir'] + '_' + 'all'
-        asset_info[file]['os_identifier_var'] = datainfo['dir'] + '_' + 'all'
+        info['os_scenegraph_var'] = os_var
+        info['os_identifier_var'] = os_var
 
-        asset_info[file]['gui_name'] = 'All Continents'
-        asset_info[file]['gui_path'] = '/' + datainfo['sub_project']
+        info['gui_name'] = 'All Continents'
+        info['gui_path'] = gui_path
 
 
 
-    # Open the file to write to
+    # Open the file and write the asset, rendered from the template in one go
     outfile = datainfo['dir'] + '.asset'
     outpath = Path.cwd() / datainfo['dir'] / outfile
-    with open(outpath, 'wt') as asset:
-
-        # Switch stdout to the file
-        sys.stdout = asset
-
-
-        print('-- ' + datainfo['project'] + ' / ' + datainfo['data_group_title'])
-        print("-- This file is auto-generated in the " + make_asset_all.__name__ + "() function inside " + Path(__file__).name)
-        print('-- Author: Brian Abbott <abbott@amnh.org>')
-        print()
-
-
-        for file in asset_info:
-            print('local ' + asset_info[file]['speck_var'] + ' = asset.resource("' + asset_info[file]['asset_rel_path'] + '/' + asset_info[file]['speck_file'] + '")')
-
-            print('local ' + asset_info[file]['label_var'] + ' = asset.resource("' + asset_info[file]['asset_rel_path'] + '/' + asset_info[file]['label_file'] + '")')
-
-            print('local ' + asset_info[file]['cmap_var'] + ' = asset.resource("' + asset_info[file]['asset_rel_path'] + '/' + asset_info[file]['cmap_file'] + '")')
-        
-
-
-        print('-- Set some parameters for OpenSpace settings')
-        print('local point_scale_factor = ' + common.HUMAN_POINT_SCALE_FACTOR)
-        print('local point_scale_exponent = ' + common.HUMAN_POINT_SCALE_EXPONENT)
-        print('local text_size = ' + common.TEXT_SIZE)
-        print('local text_min_size = ' + common.TEXT_MIN_SIZE)
-        print('local text_max_size = ' + common.TEXT_MAX_SIZE)
-        print()
-
-
-
-        for file in asset_info:
-
-            print('local ' + asset_info[file]['os_scenegraph_var'] + ' = {')
-            print('    Identifier = "' + asset_info[file]['os_identifier_var'] + '",')
-            print('    Renderable = {')
-            print('        UseCaching = false,')
-            print('        Type = "RenderablePointCloud",')
-            print('        Coloring = {')
-            print('            ColorMapping = {')
-            print('                File = asset.resource(' + asset_info[file]['cmap_var'] + '),'),
-            print('                ParameterOptions = {')
-            print('                    { Key = "continent_code", Range = { 1, 5 } },')
-            print('                }')
-            print('            },')
-            #print('                ColorOption = { "continent_code" },')
-            #print('                ColorRange = { {1,5} },')
-            print('        },')
-            #print('        Type = "RenderableCosmicPoints",')
-            #print('        Color = { 0.8, 0.8, 0.8 },')
-            
-            print('        Opacity = 1.0,')
-            print('        SizeSettings = { ScaleFactor = point_scale_factor, ScaleExponent = point_scale_exponent },')
-            print('        File = ' + asset_info[file]['speck_var'] + ',')
-            print('        Labels = { Enabled = false, Size = text_size  },')
-            print('        LabelFile = ' + asset_info[file]['label_var'] + ',')
-            print('        TextColor = { 1.0, 1.0, 1.0 },')
-            print('        TextSize = text_size,')
-            print('        TextMinMaxSize = { text_min_size, text_max_size },')
-            print('        --FadeLabelDistances = { 0.0, 0.5 },')
-            print('        --FadeLabelWidths = { 0.001, 0.5 },')
-            print('        Unit = "Km",')
-            print('        BillboardMinMaxSize = { 0.0, 25.0 },')
-            print('        EnablePixelSizeControl = true,')
-            print('        EnableLabelFading = false,')
-            print('        Enabled = false')
-            print('    },')
-            print('    GUI = {')
-            print('        Name = "' + asset_info[file]['gui_name'] + '",')
-            print('        Path = "' + asset_info[file]['gui_path'] + '",')
-            print('    }')
-            print('}')
-            print()
-
-
-
-
-        print('asset.onInitialize(function()')
-        for file in asset_info:
-            print('    openspace.addSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')')
-
-        print('end)')
-        print()
-
-
-        print('asset.onDeinitialize(function()')
-        for file in asset_info:
-            print('    openspace.removeSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')')
-        
-        print('end)')
-        print()
-
-
-        for file in asset_info:
-            print('asset.export(' + asset_info[file]['os_scenegraph_var'] + ')')
-
-    # Switch the stdout back to normal stdout (screen)
-    sys.stdout = original_stdout
+    with open(outpath, 'wt', buffering=1<<20) as asset:
+        asset.write(ASSET_TEMPLATE.format(
+            project=datainfo['project'],
+            data_group_title=datainfo['data_group_title'],
+            function_name=make_asset_all.__name__,
+            script_name=Path(__file__).name,
+            resources=''.join(f'local {info["speck_var"]} = asset.resource("{info["asset_rel_path"]}/{info["speck_file"]}")\n'
+                              f'local {info["label_var"]} = asset.resource("{info["asset_rel_path"]}/{info["label_file"]}")\n'
+                              f'local {info["cmap_var"]} = asset.resource("{info["asset_rel_path"]}/{info["cmap_file"]}")\n' for info in asset_info.values()),
+            point_scale_factor=common.HUMAN_POINT_SCALE_FACTOR,
+            point_scale_exponent=common.HUMAN_POINT_SCALE_EXPONENT,
+            text_size=common.TEXT_SIZE,
+            text_min_size=common.TEXT_MIN_SIZE,
+            text_max_size=common.TEXT_MAX_SIZE,
+            scenegraph_nodes=''.join(ALL_SCENEGRAPH_TEMPLATE.format(**info) for info in asset_info.values()),
+            add_nodes=''.join(f'    openspace.addSceneGraphNode({info["os_scenegraph_var"]})\n' for info in asset_info.values()),
+            remove_nodes=''.join(f'    openspace.removeSceneGraphNode({info["os_scenegraph_var"]})\n' for info in asset_info.values()),
+            exports=''.join(f'asset.export({info["os_scenegraph_var"]})\n' for info in asset_info.values()),
+        ))
 
  
     # Report to stdout
@@ -711,12 +619,6 @@ def make_asset_regions(datainfo):
     :type datainfo: dict of {str : list}
     """
 
-    # We shift the stdout to our filehandle so that we don't have to keep putting
-    # the filehandle in every print statement.
-    # Save the original stdout so we can switch back later
-    original_stdout = sys.stdout
-
-
     # Define the main dict that will hold all the info needed per file
     # This is a nested dict with the format:
     # { file_name: { root:  , filevar:  , os_variable:  , os_identifier:  , name:  } }
@@ -730,30 +632,37 @@ def make_asset_regions(datainfo):
     path = Path.cwd() / datainfo['dir'] / common.REGIONS_DIRECTORY
     files = sorted(path.glob('*.speck'))
 
+    # These are the same for every file, so set them once
+    cmap_file = 'regions.cmap'
+    cmap_var = common.file_variable_generator(cmap_file)
+    os_var_prefix = datainfo['dir'] + '_' + common.REGIONS_DIRECTORY + '_'
+    gui_path = '/' + datainfo['sub_project'] + '/' + common.REGIONS_DIRECTORY.title()
+
 
     for path in files:
         
         file = path.name
+        stem = path.stem
 
-        # Set the nested dict
-        asset_info[file] = {}
+        # Set the nested dict, and fill it through a local name
+        info = asset_info[file] = {}
 
-        asset_info[file]['speck_file'] = path.name
-        asset_info[file]['speck_var'] = common.file_variable_generator(asset_info[file]['speck_file'])
+        info['speck_file'] = file
+        info['speck_var'] = common.file_variable_generator(file)
 
-        # asset_info[file]['label_file'] = path.stem + '.label'
-        # asset_info[file]['label_var'] = common.file_variable_generator(asset_info[file]['label_file'])
+        # info['label_file'] = path.stem + '.label'
+        # info['label_var'] = common.file_variable_generator(info['label_file'])
 
-        asset_info[file]['cmap_file'] = 'regions.cmap'
-        asset_info[file]['cmap_var'] = common.file_variable_generator(asset_info[file]['cmap_file'])
+        info['cmap_file'] = cmap_file
+        info['cmap_var'] = cmap_var
         
-        asset_info[file]['asset_rel_path'] = common.REGIONS_DIRECTORY
+        info['asset_rel_path'] = common.REGIONS_DIRECTORY
 
-        asset_info[file]['os_scenegraph_var'] = datainfo['dir'] + '_' + common.REGIONS_DIRECTORY + '_' + path.stem
-        asset_info[file]['os_identifier_var'] = datainfo['dir'] + '_' + common.REGIONS_DIRECTORY + '_' + path.stem
+        info['os_scenegraph_var'] = os_var_prefix + stem
+        info['os_identifier_var'] = os_var_prefix + stem
 
-        asset_info[file]['gui_name'] = path.stem.replace('_', ' ').title()
-        asset_info[file]['gui_path'] = '/' + datainfo['sub_project'] + '/' + common.REGIONS_DIRECTORY.title()
+        info['gui_name'] = stem.replace('_', ' ').title()
+        info['gui_path'] = gui_path
 
 
 
@@ -784,9 +693,9 @@ def make_asset_regions(datainfo):
 
         # Step through the file_info and color_table dictionaries and 
         # set the color info to the file_info dict
-        for file, (color_name, rgb) in zip(asset_info, color_table.items()):
-            asset_info[file]['color_name'] = color_name
-            asset_info[file]['rgb'] = rgb
+        for info, (color_name, rgb) in zip(asset_info.values(), color_table.items()):
+            info['color_name'] = color_name
+            info['rgb'] = rgb
 
     else:
         sys.exit(f"{make_asset_regions.__name__}() function inside {Path(__file__).name}:\nNot enough colors for all the files. Add colors to the input_color_table.\nQuitting...")
@@ -795,94 +704,29 @@ def make_asset_regions(datainfo):
 
 
 
-    # Open the file to write to
+    # Open the file and write the asset, rendered from the template in one go.
+    # All the regions share one color map file.
     outfile = datainfo['dir'] + '_regions.asset'
     outpath = Path.cwd() / datainfo['dir'] / outfile
-    with open(outpath, 'wt') as out_asset:
-
-        # Switch stdout to the file
-        sys.stdout = out_asset
-
-
-
-        print('-- ' + datainfo['project'] + ' / ' + datainfo['data_group_title'])
-        print("-- This file is auto-generated in the " + make_asset_regions.__name__ + "() function inside " + Path(__file__).name)
-        print('-- Author: Brian Abbott <abbott@amnh.org>')
-        print()
-
-
-        print('-- Set file paths')
-        for file in asset_info:
-            print('local ' + asset_info[file]['speck_var'] + ' = asset.resource("' + asset_info[file]['asset_rel_path'] + '/' + asset_info[file]['speck_file'] + '")')
-
-
-        print('local ' + asset_info[file]['cmap_var'] + ' = asset.resource("' + asset_info[file]['asset_rel_path'] + '/' + asset_info[file]['cmap_file'] + '")')
-        print()
-
-
-        print('-- Set some parameters for OpenSpace settings')
-        print('local point_scale_factor = ' + common.HUMAN_POINT_SCALE_FACTOR)
-        print('local point_scale_exponent = ' + common.HUMAN_POINT_SCALE_EXPONENT)        
-        print('local text_size = ' + common.TEXT_SIZE)
-        print('local text_min_size = ' + common.TEXT_MIN_SIZE)
-        print('local text_max_size = ' + common.TEXT_MAX_SIZE)
-        print()
-
-
-        for file in asset_info:
-
-            print('local ' + asset_info[file]['os_scenegraph_var'] + ' = {')
-            print('    Identifier = "' + asset_info[file]['os_identifier_var'] + '",')
-            print('    Renderable = {')
-            print('        UseCaching = false,')
-            print('        Type = "RenderablePointCloud",')
-            print('         Coloring = {')
-            print('            FixedColor = { ' + asset_info[file]['rgb'] + ' },\t-- ' + asset_info[file]['color_name'])
-            print('        },')
-            #print('        Type = "RenderableCosmicPoints",')
-            #print('        Color = { ' + asset_info[file]['rgb'] + ' },\t-- ' + asset_info[file]['color_name'])
-            print('        Opacity = 1.0,')
-            print('        SizeSettings = { ScaleFactor = point_scale_factor, ScaleExponent = point_scale_exponent },')
-            print('        File = ' + asset_info[file]['speck_var'] + ',')
-            print('        DrawLabels = false,')
-            print('        Unit = "Km",')
-            print('        BillboardMinMaxSize = { 0.0, 25.0 },')
-            print('        EnablePixelSizeControl = true,')
-            print('        EnableLabelFading = false,')
-            print('        Enabled = false')
-            print('    },')
-            print('    GUI = {')
-            print('        Name = "' + asset_info[file]['gui_name'] + '",')
-            print('        Path = "' + asset_info[file]['gui_path'] + '",')
-            print('    }')
-            print('}')
-            print()
-            
-
-
-        print('asset.onInitialize(function()')
-        for file in asset_info:
-            print('    openspace.addSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')')
-
-        print('end)')
-        print()
-
-
-        print('asset.onDeinitialize(function()')
-        for file in asset_info:
-            print('    openspace.removeSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')')
-        
-        print('end)')
-        print()
-
-
-        for file in asset_info:
-            print('asset.export(' + asset_info[file]['os_scenegraph_var'] + ')')
-
-        print()
-
-    # Switch the stdout back to normal stdout (screen)
-    sys.stdout = original_stdout
+    with open(outpath, 'wt', buffering=1<<20) as out_asset:
+        out_asset.write(ASSET_TEMPLATE.format(
+            project=datainfo['project'],
+            data_group_title=datainfo['data_group_title'],
+            function_name=make_asset_regions.__name__,
+            script_name=Path(__file__).name,
+            resources='-- Set file paths\n'
+                      + ''.join(f'local {info["speck_var"]} = asset.resource("{info["asset_rel_path"]}/{info["speck_file"]}")\n' for info in asset_info.values())
+                      + f'local {cmap_var} = asset.resource("{common.REGIONS_DIRECTORY}/{cmap_file}")\n\n',
+            point_scale_factor=common.HUMAN_POINT_SCALE_FACTOR,
+            point_scale_exponent=common.HUMAN_POINT_SCALE_EXPONENT,
+            text_size=common.TEXT_SIZE,
+            text_min_size=common.TEXT_MIN_SIZE,
+            text_max_size=common.TEXT_MAX_SIZE,
+            scenegraph_nodes=''.join(REGION_SCENEGRAPH_TEMPLATE.format(**info) for info in asset_info.values()),
+            add_nodes=''.join(f'    openspace.addSceneGraphNode({info["os_scenegraph_var"]})\n' for info in asset_info.values()),
+            remove_nodes=''.join(f'    openspace.removeSceneGraphNode({info["os_scenegraph_var"]})\n' for info in asset_info.values()),
+            exports=''.join(f'asset.export({info["os_scenegraph_var"]})\n' for info in asset_info.values()) + '\n',
+        ))
 
     # Report to stdout
     common.out_file_message(outpath)
@@ -11,9 +11,14 @@ and this class provides a central location for that data.
 
 """
 
+import sys
 import taxidTools
 
 class insects:
+    # The loaded NCBI taxonomies, keyed by dump directory. Parsing the dmp files is
+    # slow, so this is shared by all insects objects rather than loaded per object.
+    _taxonomy_cache = {}
+
     def __init__(self, taxon_dump_dir):
         self.taxon_dump_dir = taxon_dump_dir
         self.taxidTools = None
@@ -21,11 +26,15 @@ class insects:
 
     def get_taxidTools(self):
         if self.taxidTools is None:
-            print("Loading NCBI taxonomy data...", end="")
-            sys.stdout.flush()
-            self.taxidTools = taxidTools.Taxonomy.from_taxdump(f"{args.taxdump}/nodes.dmp", 
-                                                            f"{args.taxdump}/rankedlineage.dmp")
-            print("done.")
+            taxonomy = insects._taxonomy_cache.get(self.taxon_dump_dir)
+            if taxonomy is None:
+                print("Loading NCBI taxonomy data...", end="")
+                sys.stdout.flush()
+                taxonomy = taxidTools.Taxonomy.from_taxdump(f"{self.taxon_dump_dir}/nodes.dmp", 
+                                                            f"{self.taxon_dump_dir}/rankedlineage.dmp")
+                insects._taxonomy_cache[self.taxon_dump_dir] = taxonomy
+                print("done.")
+            self.taxidTools = taxonomy
         return self.taxidTools
 
 
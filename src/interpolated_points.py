@@ -15,10 +15,55 @@ Created: June 2024
 '''
 
 from src import common
+import numpy as np
 import pandas as pd
 from pathlib import Path
 import sys
 
+
+# The layout of the interpolated points asset file, filled in from the asset_info
+# entries, so the Lua braces are doubled up. The scene graph node is repeated per file.
+ASSET_TEMPLATE = '''-- {project} / {data_group_title}
+-- This file is auto-generated in the {function_name}() function inside {script_name}
+-- Authors: Brian Abbott <abbott@amnh.org>, Hollister Herhold <hherhold@amnh.org>
+
+{resources}{settings}
+{scenegraph_nodes}asset.onInitialize(function()
+{add_nodes}end)
+
+asset.onDeinitialize(function()
+{remove_nodes}end)
+
+{exports}'''
+
+SCENEGRAPH_TEMPLATE = '''local {os_scenegraph_var} = {{
+    Identifier = "{os_identifier_var}",
+    Renderable = {{
+        UseCaching = false,
+        Type = "RenderableInterpolatedPoints",
+         Coloring = {{
+            FixedColor = {{ 0.8, 0.8, 0.8 }}
+        }},
+        Opacity = 1.0,
+        SizeSettings = {{ ScaleFactor = scale_factor, ScaleExponent = scale_exponent }},
+        File = {csv_var},
+        NumberOfObjects = {num_objects},
+        --FadeLabelDistances = {{ 0.0, 0.5 }},
+        --FadeLabelWidths = {{ 0.001, 0.5 }},
+        Unit = "Km",
+        BillboardMinMaxSize = {{ 0.0, 25.0 }},
+        EnablePixelSizeControl = true,
+        EnableLabelFading = false,
+        Enabled = false
+    }},
+    GUI = {{
+        Name = "{gui_name}",
+        Path = "{gui_path}",
+    }}
+}}
+
+'''
+
 class interpolated_points:
 
     def __init__(self):
@@ -44,9 +89,11 @@ class interpolated_points:
         common.test_input_file(end_file_path)
 
         # Read in the CSV files. # is the comment character and the first line is the
-        # header containing the column names.
-        start_points_df = pd.read_csv(start_file_path, comment='#')
-        end_points_df = pd.read_csv(end_file_path, comment='#')
+        # header containing the column names. Every column is carried through to the
+        # output, but the ones we use get their types up front rather than inferred.
+        point_dtypes = {'name': str, 'taxon': str, 'x': 'float64', 'y': 'float64', 'z': 'float64'}
+        start_points_df = pd.read_csv(start_file_path, comment='#', dtype=point_dtypes, engine='c')
+        end_points_df = pd.read_csv(end_file_path, comment='#', dtype=point_dtypes, engine='c')
 
         # Some datasets come in already clean with no need to check for duplicates or
         # renaming of columns.
@@ -65,16 +112,12 @@ class interpolated_points:
 
             # The list of names in each dataframe must be identical. If they are not, we
             # need to drop the names that are not in both dataframes.
-            start_names = start_points_df['name'].tolist()
-            end_names = end_points_df['name'].tolist()
-
-            # Find the names that are in one dataframe but not the other
-            start_not_end = [name for name in start_names if name not in end_names]
-            end_not_start = [name for name in end_names if name not in start_names]
+            # Find the names that are in both, as a set intersection
+            common_names = set(start_points_df['name']) & set(end_points_df['name'])
 
-            # Drop the names that are not in both dataframes
-            start_points_df = start_points_df[~start_points_df['name'].isin(start_not_end)]
-            end_points_df = end_points_df[~end_points_df['name'].isin(end_not_start)]
+            # Keep only the names that are in both dataframes
+            start_points_df = start_points_df[start_points_df['name'].isin(common_names)]
+            end_points_df = end_points_df[end_points_df['name'].isin(common_names)]
 
             # Check that the start and end points have the same number of points
             if len(start_points_df) != len(end_points_df):
@@ -83,8 +126,10 @@ class interpolated_points:
 
             # Before writing the data to a file, we need to sort the dataframes by the name
             # column. This is because the data may not be in the same order in both dataframes.
-            start_points_df = start_points_df.sort_values(by='name')
-            end_points_df = end_points_df.sort_values(by='name')
+            # Only the start points get sorted; the names are unique and the same on both
+            # sides by now, so the end points are just looked up into that order.
+            start_points_df = start_points_df.sort_values(by='name', kind='stable', ignore_index=True)
+            end_points_df = end_points_df.set_index('name').reindex(start_points_df['name']).reset_index()[end_points_df.columns]
 
         # Save the number of points for use in making the asset file.
         self.num_objects = len(start_points_df)
@@ -92,21 +137,23 @@ class interpolated_points:
 
         # Finally, we need to make a dataframe that contains the start points followed by
         # the end points. This is the data that will be written to the csv file.
-        interpolated_points_df = pd.concat([start_points_df, end_points_df], ignore_index=True)
+        interpolated_points_df = pd.concat([start_points_df, end_points_df], ignore_index=True, copy=False)
 
         # We also need to add a new column at the beginning of the dataframe that contains
         # the time value. This is the value that will be used to interpolate between the
         # start and end points. For this example, start is 0 and end is 1. If a time
         # column already exists, do nothing.
         if 'time' not in interpolated_points_df.columns:
-            interpolated_points_df.insert(0, 'time', [0] * len(start_points_df) + [1] * len(end_points_df))
+            interpolated_points_df.insert(0, 'time', np.repeat(np.array([0, 1], dtype=np.int8), [len(start_points_df), len(end_points_df)]))
 
         # If datainfo has a scale_factor, use it to scale the data. Otherwise,
         # do nothing - the default is no scaling.
+        # All three columns are scaled in one multiply. Pulling the columns out already
+        # makes a copy, so scale that copy in place rather than making another.
         if 'scale_factor' in datainfo:
-            interpolated_points_df['x'] = interpolated_points_df['x'].multiply(datainfo['scale_factor'])
-            interpolated_points_df['y'] = interpolated_points_df['y'].multiply(datainfo['scale_factor'])
-            interpolated_points_df['z'] = interpolated_points_df['z'].multiply(datainfo['scale_factor'])
+            xyz = interpolated_points_df[['x', 'y', 'z']].to_numpy()
+            np.multiply(xyz, datainfo['scale_factor'], out=xyz)
+            interpolated_points_df[['x', 'y', 'z']] = xyz
 
         # Write the data to a csv file, and put it where we're told.
         outfile = datainfo['dir'] + '_interpolated.csv'
@@ -129,111 +176,48 @@ class interpolated_points:
             datainfo['dir']_interpolated.asset
         '''
 
-        # We shift the stdout to our filehandle so that we don't have to keep putting
-        # the filehandle in every print statement.
-        # Save the original stdout so we can switch back later
-        original_stdout = sys.stdout
-
         # Define the main dict that will hold all the info needed per file
         # This is a nested dict with the format:
         #      { path: { root:  , filevar:  , os_variable:  , os_identifier:  , name:  } }
         asset_info = {}
 
-        # Set the nested dict
+        # Set the nested dict, and fill it through a local name
         file = self.interpolated_points_csv_full_path.name
-        asset_info[file] = {}
+        info = asset_info[file] = {}
 
-        asset_info[file]['csv_file'] = self.interpolated_points_csv_full_path.name
-        asset_info[file]['csv_var'] = common.file_variable_generator(asset_info[file]['csv_file'])
+        info['csv_file'] = file
+        info['csv_var'] = common.file_variable_generator(file)
 
-        #asset_info[file]['label_file'] = path.name + '.label'
-        #asset_info[file]['label_var'] = common.file_variable_generator(asset_info[file]['label_file'])
+        #info['label_file'] = path.name + '.label'
+        #info['label_var'] = common.file_variable_generator(info['label_file'])
 
-        #asset_info[file]['cmap_file'] = path.name + '.cmap'
-        #asset_info[file]['cmap_var'] = common.file_variable_generator(asset_info[file]['cmap_file'])
+        #info['cmap_file'] = path.name + '.cmap'
+        #info['cmap_var'] = common.file_variable_generator(info['cmap_file'])
 
-        asset_info[file]['asset_rel_path'] = '.'
+        info['asset_rel_path'] = '.'
 
-        asset_info[file]['os_scenegraph_var'] = datainfo['dir'] + '_' + datainfo['tree_dir'] + '_interpolated'
-        asset_info[file]['os_identifier_var'] = datainfo['dir'] + '_' + datainfo['tree_dir'] + '_interpolated'
+        info['os_scenegraph_var'] = info['os_identifier_var'] = datainfo['dir'] + '_' + datainfo['tree_dir'] + '_interpolated'
 
-        asset_info[file]['gui_name'] = 'Interpolated Points'
-        asset_info[file]['gui_path'] = '/' + datainfo['sub_project'] + '/' + datainfo['tree_dir'].replace('_', ' ').title()
+        info['gui_name'] = 'Interpolated Points'
+        info['gui_path'] = '/' + datainfo['sub_project'] + '/' + datainfo['tree_dir'].replace('_', ' ').title()
 
-        # Open the file to write to
+        # Open the file and write the asset, rendered from the template in one go
         outfile = datainfo['dir'] + '_interpolated.asset'
         outpath = Path.cwd() / datainfo['dir'] / datainfo['tree_dir'] / outfile
-        with open(outpath, 'wt') as asset_file:
-
-            # Switch stdout to the file
-            sys.stdout = asset_file
-
-            print('-- ' + datainfo['project'] + ' / ' + datainfo['data_group_title'])
-            print("-- This file is auto-generated in the " + self.make_asset_interpolated_points.__name__ + "() function inside " + Path(__file__).name)
-            print('-- Authors: Brian Abbott <abbott@amnh.org>, Hollister Herhold <hherhold@amnh.org>')
-            print()
-
-            print('local ' + asset_info[file]['csv_var'] + ' = asset.resource("' + asset_info[file]['asset_rel_path'] + '/' + asset_info[file]['csv_file'] + '")')
-
-            print('-- Set some parameters for OpenSpace settings')
-            print('local scale_factor = ' + common.POINT_SCALE_FACTOR)
-            print('local scale_exponent = ' + common.POINT_SCALE_EXPONENT)
-            print('local text_size = ' + common.TEXT_SIZE)
-            print('local text_min_size = ' + common.TEXT_MIN_SIZE)
-            print('local text_max_size = ' + common.TEXT_MAX_SIZE)
-            print()
-
-            for file in asset_info:
-
-                print('local ' + asset_info[file]['os_scenegraph_var'] + ' = {')
-                print('    Identifier = "' + asset_info[file]['os_identifier_var'] + '",')
-                print('    Renderable = {')
-                print('        UseCaching = false,')
-                print('        Type = "RenderableInterpolatedPoints",')
-                print('         Coloring = {')
-                print('            FixedColor = { 0.8, 0.8, 0.8 }')
-                print('        },')
-                print('        Opacity = 1.0,')
-                print('        SizeSettings = { ScaleFactor = scale_factor, ScaleExponent = scale_exponent },')
-                print('        File = ' + asset_info[file]['csv_var'] + ',')
-                print('        NumberOfObjects = ' + str(self.num_objects) + ',')
-                #print('        DrawLabels = false,')
-                #print('        LabelFile = ' + asset_info[file]['label_var'] + ',')
-                #print('        TextColor = { 1.0, 1.0, 1.0 },')
-                #print('        TextSize = text_size,')
-                #print('        TextMinMaxSize = { text_min_size, text_max_size },')
-                print('        --FadeLabelDistances = { 0.0, 0.5 },')
-                print('        --FadeLabelWidths = { 0.001, 0.5 },')
-                print('        Unit = "Km",')
-                print('        BillboardMinMaxSize = { 0.0, 25.0 },')
-                print('        EnablePixelSizeControl = true,')
-                print('        EnableLabelFading = false,')
-                print('        Enabled = false')
-                print('    },')
-                print('    GUI = {')
-                print('        Name = "' + asset_info[file]['gui_name'] + '",')
-                print('        Path = "' + asset_info[file]['gui_path'] + '",')
-                print('    }')
-                print('}')
-                print()
-
-            print('asset.onInitialize(function()')
-            for file in asset_info:
-                print('    openspace.addSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')')
-
-            print('end)')
-            print()
-
-            print('asset.onDeinitialize(function()')
-            for file in asset_info:
-                print('    openspace.removeSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')')
-            
-            print('end)')
-            print()
-
-            for file in asset_info:
-                print('asset.export(' + asset_info[file]['os_scenegraph_var'] + ')')
-
+        with open(outpath, 'wt', buffering=1<<20) as asset_file:
+
+            asset_file.write(ASSET_TEMPLATE.format(
+                project=datainfo['project'],
+                data_group_title=datainfo['data_group_title'],
+                function_name=self.make_asset_interpolated_points.__name__,
+                script_name=Path(__file__).name,
+                resources=''.join(f'local {info["csv_var"]} = asset.resource("{info["asset_rel_path"]}/{info["csv_file"]}")\n' for info in asset_info.values()),
+                settings=common.ASSET_SETTINGS,
+                scenegraph_nodes=''.join(SCENEGRAPH_TEMPLATE.format(num_objects=self.num_objects, **info) for info in asset_info.values()),
+                add_nodes=''.join(f'    openspace.addSceneGraphNode({info["os_scenegraph_var"]})\n' for info in asset_info.values()),
+                remove_nodes=''.join(f'    openspace.removeSceneGraphNode({info["os_scenegraph_var"]})\n' for info in asset_info.values()),
+                exports=''.join(f'asset.export({info["os_scenegraph_var"]})\n' for info in asset_info.values()),
+            ))
 
             
 
@@ -247,11 +231,7 @@ class interpolated_points:
             # }
 
 
-            # Switch the stdout back to normal stdout (screen)
-            sys.stdout = original_stdout
-
-        
-            # Report to stdout
-            common.out_file_message(outpath)
-            print()
+        # Report to stdout
+        common.out_file_message(outpath)
+        print()
 
@@ -8,8 +8,9 @@ to handle lineage information from the NCBI taxonomy database.
 """
 
 
+import sys
+import numpy as np
 import pandas as pd
-import re
 from pathlib import Path
 from os import stat
 
@@ -49,6 +50,10 @@ class metadata:
 
         :file:`catalogs_processed/[{order}]/[{version}]/metadata.csv`
             A csv file with the processed metadata.
+
+        :file:`catalogs_processed/[{order}]/[{version}]/metadata.pkl`
+            A pickle of the processed metadata, read back in place of processing when
+            it is newer than the input file.
         
         :file:`catalogs_processed/[{order}]/[{version}]/lineage.dat`
             A human-readable list of lineage codes for each lineage level.
@@ -87,36 +92,46 @@ class metadata:
         metadata_output_filename = "processed_" + self.datainfo['metadata_file']
         processed_metadata = Path.cwd() / common.PROCESSED_DATA_DIRECTORY / self.datainfo['dir'] / self.datainfo['catalog_directory'] / metadata_output_filename
         
+        # The cache itself is a pickle of the processed dataframe, written next to the CSV.
+        # It loads without parsing 30-odd text columns, and hands back the same dtypes
+        # as a fresh run. The CSV is still written for reference.
+        processed_metadata_cache = processed_metadata.with_suffix('.pkl')
+
         # Is the metadata file older than the processed metadata file?
         metadata_file_time = stat(inpath).st_mtime
-        processed_metadata_time = stat(processed_metadata).st_mtime if processed_metadata.exists() else 0
+        processed_metadata_time = stat(processed_metadata_cache).st_mtime if processed_metadata_cache.exists() else 0
         if metadata_file_time < processed_metadata_time:
             print('          *** Using already processed (cached) metadata.')
-            return pd.read_csv(processed_metadata, sep=',')
+            return pd.read_pickle(processed_metadata_cache)
 
         # If we're here, then we need to process the metadata file. This is the slow part of the script.
 
         # Read the input CSV file from Wandrille.
-        df = pd.read_csv(inpath, sep=';', header=0, names=['taxon', 'species', 'hybrid', 'subspecies', 'lineage'])
+        # The column types are given up front rather than inferred.
+        df = pd.read_csv(inpath, sep=';', header=0, names=['taxon', 'species', 'hybrid', 'subspecies', 'lineage'],
+                         dtype={'taxon': str, 'species': str, 'hybrid': 'boolean', 'subspecies': str, 'lineage': str}, engine='c')
+
+        # Number of lineage columns, e.g. 34 for the primates
+        num_lineage_columns = int(self.datainfo['lineage_columns'][1])
 
         # Split the comma-separated lineage column in the CSV file into its
         # own dataframe so we can process it separately.
         split_cols = df['lineage'].str.split(',', expand=True)
 
+        # The widest lineage in the file must match the number of lineage columns we expect
+        if split_cols.shape[1] != num_lineage_columns:
+            sys.exit(f"{self.process_data.__name__}() function inside {Path(__file__).name}:\nThe lineage column in {inpath.name} has {split_cols.shape[1]} fields, but lineage_columns expects {num_lineage_columns}.\nQuitting...")
+
         # Rename each column to "lineage_i" for columns 1-34.
         # Note, we need to add one to the end of the range.
-        split_cols.columns = [f'lineage_{i}' for i in range(1, int(self.datainfo['lineage_columns'][1])+1)]
-
-        # Save the dataframe into a new dataframe
-        metadata = df.join(split_cols)
+        split_cols.columns = [f'lineage_{i}' for i in range(1, num_lineage_columns+1)]
 
-        # Delete the comma-separated column called "lineage" from the dataframe,
-        # it's replaced by the individual columns now.
-        del metadata['lineage']
+        # Save the dataframe into a new dataframe, leaving out the comma-separated
+        # column called "lineage", it's replaced by the individual columns now.
+        metadata = df.drop(columns='lineage').join(split_cols)
 
-        # Change the hybrid column from "True|False" to "1" or "0"
-        metadata['hybrid'] = metadata['hybrid'].replace([True], '1')
-        metadata['hybrid'] = metadata['hybrid'].replace([False], '0')
+        # Change the hybrid column from "True|False" to "1" or "0", in one pass
+        metadata['hybrid'] = metadata['hybrid'].map({True: '1', False: '0'})
 
 
         # Step through each column of the metadata dataframe. We need to assign
@@ -126,11 +141,6 @@ class metadata:
         #   [i] value is a running 1-N code of the unique number of entries for that column
         # ---------------------------------------------------------------------------
         
-        # lineage is a nested dict, with lineage_X: {lineage_code: lineage_name} format,
-        # for example: { lineage_31: { 31009: Homo } }
-        # Lineage is NOT an NCBI taxid, for example NCBI taxid 31009 is Clariidae (airbreathing catfishes).
-        lineage = dict()
-
         # unique_values holds all the unique lineage values temporarily
         unique_values = list()
 
@@ -142,23 +152,26 @@ class metadata:
         # entries. So, when we add the [i] to the [col_num], the 500th unique item in col 22 becomes 22500.
         col_num = 100
 
-        ## NOTE: Making this dataframe is the slowest part of this function.
-        
+        # lineage_codes holds the lineage_*_code columns as int32 arrays. They're all
+        # joined onto the metadata in one go after the loop, rather than one at a time.
+        lineage_codes = dict()
+
         # Step through each column (key) in the metadata dataframe.
-        for col in metadata:
+        for col in metadata.columns:
             
             # For those columns that match on "lineage_", perform the following
-            if re.match('^lineage_', col):
+            if col.startswith('lineage_'):
                 
                 # reset the lineage code for each column
                 i = 1
 
+                # Make the column a categorical, with its unique items as the categories
+                # in the order they first appear. Missing values (None) aren't categories,
+                # so they get a category code of -1.
+                lineage_cat = pd.Categorical(metadata[col], categories=pd.unique(metadata[col].dropna()))
+
                 # Put each unique item in the column into a list
-                temp_list = list(metadata[col].unique())
-                
-                # If any column contains None, remove it from our unique values list
-                if None in temp_list:
-                    temp_list.remove(None)
+                temp_list = lineage_cat.categories.tolist()
 
                 # Number of unique values
                 unique_values.append(len(temp_list))
@@ -175,50 +188,20 @@ class metadata:
                 # putting them into a dictionary of the form {lineage_code: lineage_value}
                 unique_lineage[col] = dict(enumerate(temp_list, start=start_val))
 
-                # Convert the dictionary into a pandas series. This series only holds
-                # one column of unique values
+                # The category codes run 0-N in the same order as the dictionary, so the
+                # lineage code for every row is just the category code plus the start value.
+                # Rows with no value in this lineage column (None) get a code of zero.
                 series_name = col + '_code'
-                lineage = pd.Series(unique_lineage[col], name=series_name)
-                
-                
-                # Run thru each value in each lineage metadata column (lineage_* cols only)
-                row_number = 0
-                for value in metadata[col]:
-
-                    # If the value in the lineage_* column is None,
-                    # then set it to zero and go to the next row in metadata
-                    if value is None:
-                        metadata.at[row_number, series_name] = 0
-                        row_number += 1
-                        continue
-
-
-                    # If metadata value is not None, then run thru each value in the 
-                    # unique lineage pandas series.
-                    for v in lineage:
-
-                        # If the metadata value and the value in the lineage series match,
-                        # get the code and save it to metadata in a new column lineage_*_code.
-                        if v == value:
-                            
-                            # Get the index number for the matching values. These index
-                            # numbers are the lineage codes we need. (30001, etc.)
-                            lineage_code = lineage[lineage == v].index[0]
-                            #print(type(lineage_code))
-
-                            # Write the new column and give the row the lineage_code value
-                            metadata.at[row_number, series_name] = int(lineage_code)
-
-                            # Iterate the row number to go to the next row in metadata column
-                            row_number += 1
-
-                # Convert this column to an integer, as it's apparently by default a float
-                metadata = metadata.astype({series_name : 'int32'})
+                category_codes = lineage_cat.codes.astype('int32')
+                lineage_codes[series_name] = np.where(category_codes >= 0, category_codes + start_val, np.int32(0)).astype('int32', copy=False)
 
                 # Iterate the column number. 100 because we need unique values for 
                 # each unique entry in each lineage column. See comment above where this is defined.
                 col_num += 100
 
+        # Add the lineage_*_code columns to the end of the metadata
+        metadata = metadata.join(pd.DataFrame(lineage_codes, index=metadata.index))
+
 
 
 
@@ -239,6 +222,9 @@ class metadata:
             metadata.to_csv(csv_metadata, index=False, lineterminator='\n')
 
 
+        # Save the cached copy that's read back in on the next run
+        metadata.to_pickle(processed_metadata_cache)
+
         # Report to stdout
         common.out_file_message(outpath_metadata_csv)
 
@@ -260,40 +246,42 @@ class metadata:
         outfile_lineage_csv = 'lineage.csv'
         outpath_lineage_csv = outpath / outfile_lineage_csv
 
-        with open(outpath_lineage_key_dat, 'wt') as dat_lineage_key, \
-            open(outpath_lineage_key_csv, 'wt') as csv_lineage_key, \
-            open(outpath_lineage_csv, 'wt') as csv_lineage:
-            
-            # Print some header info at the top of the file
-            header = common.header(self.datainfo)
-            print(header, file=dat_lineage_key)
-
-            # Print the lineage items in a custom format
-            # num_lineage_values is the counter for the unique_values list, which keeps 
-            # track of how many values are in each lineage column.
-            num_lineage_values = 0
-            for k, v in unique_lineage.items():
-                
-                # Get the integer from the lineage column name
-                lineage_col_number = int(re.search(r'\d+', k).group())
+        # Build up the three files in memory, then write each one in a single go.
+        # Start with some header info at the top of the dat file.
+        dat_lines = [common.header(self.datainfo) + '\n']
+        csv_key_lines = []
+        csv_lines = []
 
-                # Print the lineage column as a subhead
-                print(f"{k}: {unique_values[num_lineage_values]} unique members", file=dat_lineage_key)
+        # Gather the lineage items in a custom format. unique_values keeps track of how
+        # many values are in each lineage column, in the same order as unique_lineage.
+        for (k, v), num_unique in zip(unique_lineage.items(), unique_values):
 
-                # Print the lineage column name, number, and number of unique values in that column
-                print(f"{k},{lineage_col_number},{unique_values[num_lineage_values]} | ", file=csv_lineage, end='')
+            # Get the integer from the lineage column name
+            lineage_col_number = int(k.rsplit('_', 1)[1])
 
-                # Run thru the lineage nested dict and print the key-value pairs
-                for key, value in v.items():
-                    print(f"    {key} = {value}", file=dat_lineage_key)
-                    print(f"{key},{value}", file=csv_lineage_key)
-                    print(f"{value},", file=csv_lineage, end='')
-                
-                # Print a final newline after each lineage column to kick off a new one
-                print('\n', file=dat_lineage_key)
-                print(file=csv_lineage)
+            # The lineage column as a subhead
+            dat_lines.append(f"{k}: {num_unique} unique members\n")
 
-                num_lineage_values += 1
+            # The lineage column name, number, and number of unique values in that column
+            csv_lines.append(f"{k},{lineage_col_number},{num_unique} | ")
+
+            # Run thru the lineage nested dict and add the key-value pairs
+            for key, value in v.items():
+                dat_lines.append(f"    {key} = {value}\n")
+                csv_key_lines.append(f"{key},{value}\n")
+                csv_lines.append(f"{value},")
+
+            # A final newline after each lineage column to kick off a new one
+            dat_lines.append('\n\n')
+            csv_lines.append('\n')
+
+        with open(outpath_lineage_key_dat, 'wt') as dat_lineage_key, \
+            open(outpath_lineage_key_csv, 'wt') as csv_lineage_key, \
+            open(outpath_lineage_csv, 'wt') as csv_lineage:
+
+            dat_lineage_key.write(''.join(dat_lines))
+            csv_lineage_key.write(''.join(csv_key_lines))
+            csv_lineage.write(''.join(csv_lines))
 
 
         common.out_file_message(outpath_lineage_key_dat)
@@ -328,25 +316,25 @@ class metadata:
 
             # Print all the column names
             print('Columns:', file=log)
-            print(pd.DataFrame({"column": metadata.columns, "non-nulls": len(metadata)-metadata.isnull().sum().values, "nulls": metadata.isnull().sum().values, "type": metadata.dtypes.values}), file=log)
+            nulls = metadata.isnull().sum().values
+            print(pd.DataFrame({"column": metadata.columns, "non-nulls": len(metadata)-nulls, "nulls": nulls, "type": metadata.dtypes.values}), file=log)
             print(file=log)
 
 
             # Print the lineage stats
 
-            # Cycle thru the columns in the metadata df
-            for col in metadata.columns:
-
-                # If the column ends in "_code", to catch the lineage_*_code columns
-                if re.search(r'_code$', col):
+            # Cycle thru the columns ending in "_code" in the metadata df, to catch the
+            # lineage_*_code columns
+            code_columns = [col for col in metadata.columns if col.endswith('_code')]
+            for col in code_columns:
 
-                    # Print the column name
-                    print('Column: ' + col, file=log)
+                # Print the column name
+                print('Column: ' + col, file=log)
 
-                    # Print the unique values and their count, sorted by the column, not the highest count
-                    print(metadata[col].value_counts().sort_index(), file=log)
-                    #print(metadata[col].value_counts(), file=log)
-                    print(file=log)
+                # Print the unique values and their count, sorted by the column, not the highest count
+                print(metadata[col].value_counts(sort=False).sort_index(), file=log)
+                #print(metadata[col].value_counts(), file=log)
+                print(file=log)
 
 
         common.out_file_message(outpath_log)
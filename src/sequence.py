@@ -6,8 +6,9 @@
 Process the DNA sequence data, which has many points per species. This combines the metadata dataframe and results in one speck file for the sequence data. Labels and colors are generated by the :file:`sequence_lineage.py` script.
 """
 
-import sys
+import os
 import re
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
@@ -46,11 +47,14 @@ def process_data(datainfo, metadata):
     datainfo['data_group_title'] = datainfo['sub_project'] + ': DNA sequence data'
     datainfo['data_group_desc'] = 'DNA sample data for primates. Each point represents one DNA sample.'
 
+    # The header is the same for every output file, so build it once
+    header = common.header(datainfo, script_name=Path(__file__).name)
+
 
 
     # Read the sequence file and process into a dataframe
     # ---------------------------------------------------------------------------
-    inpath = Path.cwd() / common.DATA_DIRECTORY / datainfo['dir'] / datainfo['catalog_directory'] / datainfo['sequence_file']
+    inpath = common.BASE_PATH / common.DATA_DIRECTORY / datainfo['dir'] / datainfo['catalog_directory'] / datainfo['sequence_file']
     common.test_input_file(inpath)
 
     seq = pd.read_csv(inpath)
@@ -59,7 +63,7 @@ def process_data(datainfo, metadata):
 
     # Read the sequence-to-taxon file and process into a dataframe
     # ---------------------------------------------------------------------------
-    inpath_seq2taxon = Path.cwd() / common.DATA_DIRECTORY / datainfo['dir'] / datainfo['catalog_directory'] / datainfo['seq2taxon_file']
+    inpath_seq2taxon = common.BASE_PATH / common.DATA_DIRECTORY / datainfo['dir'] / datainfo['catalog_directory'] / datainfo['seq2taxon_file']
     common.test_input_file(inpath_seq2taxon)
 
     seq2taxon = pd.read_csv(inpath_seq2taxon, sep=';', header=None, names=['seq_id', 'Taxon'])
@@ -85,7 +89,7 @@ def process_data(datainfo, metadata):
     # only if the value of the datainfo is not None
     if datainfo['synonomous_file'] is not None:
         
-        inpath_synonomous = Path.cwd() / common.DATA_DIRECTORY / datainfo['dir'] / datainfo['catalog_directory'] / datainfo['synonomous_file']
+        inpath_synonomous = common.BASE_PATH / common.DATA_DIRECTORY / datainfo['dir'] / datainfo['catalog_directory'] / datainfo['synonomous_file']
         common.test_input_file(inpath_synonomous)
 
         syn_init = pd.read_csv(inpath_synonomous)
@@ -114,10 +118,8 @@ def process_data(datainfo, metadata):
 
 
     
-    # Rescale the position data
-    df['x'] = df['x'].multiply(common.POSITION_SCALE_FACTOR)
-    df['y'] = df['y'].multiply(common.POSITION_SCALE_FACTOR)
-    df['z'] = df['z'].multiply(common.POSITION_SCALE_FACTOR)
+    # Rescale the position data, all three columns in one multiply
+    df[['x', 'y', 'z']] = df[['x', 'y', 'z']].to_numpy() * common.POSITION_SCALE_FACTOR
 
 
     # Assign a taxon code    
@@ -132,9 +134,9 @@ def process_data(datainfo, metadata):
 
 
 
-    # Construct the .speck and .label columns
-    df.loc[df['taxon'].notnull(), 'speck_name'] = df['seq_id'] + ' | ' + df['taxon']
-    df.loc[df['taxon'].isnull(), 'speck_name'] = df['seq_id']
+    # Construct the .speck and .label columns, choosing per row in a single pass
+    has_taxon = df['taxon'].notna().to_numpy()
+    df['speck_name'] = np.where(has_taxon, (df['seq_id'] + ' | ' + df['taxon']).to_numpy(), df['seq_id'].to_numpy())
 
 
 
@@ -142,7 +144,7 @@ def process_data(datainfo, metadata):
     # This way we assign a color to each taxon_code.
     # ---------------------------------------------------------------------------
     # Read in the crayola.dat
-    inpath = Path.cwd() / common.PROCESSED_DATA_DIRECTORY / common.COLOR_DIRECTORY / 'crayola' / 'crayola.dat'
+    inpath = common.BASE_PATH / common.PROCESSED_DATA_DIRECTORY / common.COLOR_DIRECTORY / 'crayola' / 'crayola.dat'
 
     # Function reads the color table file, generates a df of colors
     # with as many entries from the length passed.
@@ -156,7 +158,7 @@ def process_data(datainfo, metadata):
     #unique_taxons.to_csv(f"{datainfo['catalog_directory']}_taxon_codes.csv")
 
     # Print this to a csv file
-    outpath_taxon_csv = Path.cwd() / common.PROCESSED_DATA_DIRECTORY / datainfo['dir']
+    outpath_taxon_csv = common.BASE_PATH / common.PROCESSED_DATA_DIRECTORY / datainfo['dir']
     common.test_path(outpath_taxon_csv)
 
     #outfile_csv = datainfo['dir'] + '.csv'
@@ -174,14 +176,13 @@ def process_data(datainfo, metadata):
     # Print the speck file
     # --------------------------------------------------------------------------
     out_file_stem = 'sequences'
-    outpath = Path.cwd() / datainfo['dir'] / datainfo['catalog_directory'] / common.SEQUENCE_DIRECTORY
+    outpath = common.BASE_PATH / datainfo['dir'] / datainfo['catalog_directory'] / common.SEQUENCE_DIRECTORY
     common.test_path(outpath)
 
     outfile_speck = out_file_stem + '.speck'
     outpath_speck = outpath / outfile_speck
-    with open(outpath_speck, 'wt') as speck:
+    with open(outpath_speck, 'wt', buffering=1<<20) as speck:
 
-        header = common.header(datainfo, script_name=Path(__file__).name)
         print(header, file=speck)
 
         # Print the 'datavar' columns.
@@ -217,18 +218,18 @@ def process_data(datainfo, metadata):
             i += 1
 
         
-        # Print the rows to the speck file
-        for col, row in df.iterrows():
-
-            # Print the x,y,z
-            print(f"{row['x']:.8f} {row['y']:.8f} {row['z']:.8f}", file=speck, end ='')
-
-            # Print the data for the columns in the selected columns in cols_to_print
-            for column in cols_to_print:
-                print(f" {int(row[column])}", file=speck, end ='')
-            
-            # Print the speck label commented at the end of the line
-            print(f" # {row['speck_name']}", file=speck)
+        # Build the rows for the speck file a column at a time, rather than row by row
+        # Start with the x,y,z, formatted in one pass over all three columns
+        coords = np.char.mod('%.8f', df[['x', 'y', 'z']].to_numpy())
+        rows = pd.Series(coords.tolist(), index=df.index).str.join(' ')
+
+        # Add the data for the columns in the selected columns in cols_to_print
+        for column in cols_to_print:
+            rows = rows + ' ' + df[column].astype(int).astype(str)
+        
+        # Add the speck label commented at the end of the line, then print the rows to the speck file
+        rows = rows + ' # ' + df['speck_name'] + '\n'
+        speck.write(''.join(rows))
 
     common.out_file_message(outpath_speck)
 
@@ -236,7 +237,7 @@ def process_data(datainfo, metadata):
         
     # Print data to a CSV file
     # --------------------------------------------------------------------------
-    outpath_csv = Path.cwd() / common.PROCESSED_DATA_DIRECTORY / datainfo['dir'] / datainfo['catalog_directory']
+    outpath_csv = common.BASE_PATH / common.PROCESSED_DATA_DIRECTORY / datainfo['dir'] / datainfo['catalog_directory']
     common.test_path(outpath_csv)
 
     #outfile_csv = datainfo['dir'] + '.csv'
@@ -250,31 +251,30 @@ def process_data(datainfo, metadata):
 
     # Print the color map file. This will print a color for each unique taxon
     # ---------------------------------------------------------------------------
-    outpath_cmap = Path.cwd() / datainfo['dir'] / datainfo['catalog_directory'] / common.SEQUENCE_DIRECTORY
+    outpath_cmap = common.BASE_PATH / datainfo['dir'] / datainfo['catalog_directory'] / common.SEQUENCE_DIRECTORY
     common.test_path(outpath_cmap)
 
     outfile_cmap = out_file_stem + '_taxon.cmap'
     outpath_cmap = outpath_cmap / outfile_cmap
 
 
-    with open(outpath_cmap, 'wt') as cmap:
-
-        header = common.header(datainfo, script_name=Path(__file__).name)
-        print(header, file=cmap)
+    # Collect the lines of the color map file, then write them in one go
+    cmap_lines = [header + '\n']
 
-        # Print the number of colors
-        print(f"{len(unique_taxons)}", file=cmap)
+    # The number of colors
+    cmap_lines.append(f"{len(unique_taxons)}\n")
 
-        # Print the initial "out of bounds" color
-        #print("1.0 1.0 1.0 1.0 # White (out-of-bounds)", file=cmap)
-        # Set the gray color for the zero-valued lineage points
-        gray_color = ((str(common.GRAY_COLOR) + ' ') * 3) +  '1.0 # Gray | Used for zero or out-of-range value lineage codes'
-        print(gray_color, file=cmap)
+    # The initial "out of bounds" color
+    #cmap_lines.append("1.0 1.0 1.0 1.0 # White (out-of-bounds)\n")
+    # Set the gray color for the zero-valued lineage points
+    gray_color = ((str(common.GRAY_COLOR) + ' ') * 3) +  '1.0 # Gray | Used for zero or out-of-range value lineage codes'
+    cmap_lines.append(gray_color + '\n')
 
-        for col, row in unique_taxons.iterrows():
+    # The RGB for each taxon
+    cmap_lines.extend(f"{rgb} 1.0 # {color_name} | {taxon} | {taxon_code}\n" for taxon_code, taxon, rgb, color_name in unique_taxons[['taxon_code', 'taxon', 'rgb', 'color_name']].itertuples(index=False, name=None))
 
-            # Print the RGB
-            print(f"{row['rgb']} 1.0 # {row['color_name']} | {row['taxon']} | {row['taxon_code']}", file=cmap)
+    with open(outpath_cmap, 'wt') as cmap:
+        cmap.write(''.join(cmap_lines))
 
 
     common.out_file_message(outpath_cmap)
@@ -316,6 +316,93 @@ def process_data(datainfo, metadata):
 
 
 
+def _emit_asset(asset_info, datainfo, fh):
+    """
+    Write the sequence asset file contents to an open file handle.
+
+    :param asset_info: The per-file info gathered in :func:`make_asset`.
+    :type asset_info: dict of {str : dict}
+    :param datainfo: Metadata about the dataset.
+    :type datainfo: dict of {str : list}
+    :param fh: The open asset file.
+    :type fh: file object
+    """
+
+    print('-- ' + datainfo['project'] + ' / ' + datainfo['data_group_title'], file=fh)
+    print("-- This file is auto-generated in the " + make_asset.__name__ + "() function inside " + Path(__file__).name, file=fh)
+    print('-- Author: Brian Abbott <abbott@amnh.org>', file=fh)
+    print(file=fh)
+
+
+    for file in asset_info:
+        print('local ' + asset_info[file]['speck_var'] + ' = asset.resource("' + asset_info[file]['asset_rel_path'] + '/' + asset_info[file]['speck_file'] + '")', file=fh)
+
+        #print('local ' + asset_info[file]['label_var'] + ' = asset.resource("' + asset_info[file]['asset_rel_path'] + '/' + asset_info[file]['label_file'] + '")')
+
+        print('local ' + asset_info[file]['cmap_var'] + ' = asset.resource("' + asset_info[file]['asset_rel_path'] + '/' + asset_info[file]['cmap_file'] + '")', file=fh)
+    
+        #print('local color_file = asset.resource("' + asset_info[file]['cmap_file'] + '")')
+
+
+    fh.write(common.ASSET_SETTINGS)
+    print(file=fh)
+
+
+
+    for file in asset_info:
+
+        print('local ' + asset_info[file]['os_scenegraph_var'] + ' = {', file=fh)
+        print('    Identifier = "' + asset_info[file]['os_identifier_var'] + '",', file=fh)
+        print('    Renderable = {', file=fh)
+        print('        UseCaching = false,', file=fh)
+        print('        Type = "RenderablePointCloud",', file=fh)
+        print('         Coloring = {', file=fh)
+        print('            FixedColor = { 0.8, 0.8, 0.8 }', file=fh)
+        print('        },', file=fh)
+        print('        ColorMap = ' + asset_info[file]['cmap_var'] + ',', file=fh)
+        print('        ColorOption = { "lineage_30_code", "taxon_code" },', file=fh)
+        print('        ColorRange = { {30001, 30025}, {1, 322} },', file=fh)
+        print('        Opacity = 1.0,', file=fh)
+        print('        SizeSettings = { ScaleExponent = scale_exponent, ScaleFactor = scale_factor },', file=fh)
+        print('        File = ' + asset_info[file]['speck_var'] + ',', file=fh)
+        print('        DrawLabels = false,', file=fh)
+        print('        Unit = "Km",', file=fh)
+        print('        BillboardMinMaxSize = { 0.0, 25.0 },', file=fh)
+        print('        EnablePixelSizeControl = true,', file=fh)
+        print('        EnableLabelFading = false,', file=fh)
+        print('        Enabled = false', file=fh)
+        print('    },', file=fh)
+        print('    GUI = {', file=fh)
+        print('        Name = "' + asset_info[file]['gui_name'] + '",', file=fh)
+        print('        Path = "' + asset_info[file]['gui_path'] + '",', file=fh)
+        print('    }', file=fh)
+        print('}', file=fh)
+        print(file=fh)
+
+
+
+    print('asset.onInitialize(function()', file=fh)
+    for file in asset_info:
+        print('    openspace.addSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')', file=fh)
+
+    print('end)', file=fh)
+    print(file=fh)
+
+
+    print('asset.onDeinitialize(function()', file=fh)
+    for file in asset_info:
+        print('    openspace.removeSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')', file=fh)
+    
+    print('end)', file=fh)
+    print(file=fh)
+
+
+    for file in asset_info:
+        print('asset.export(' + asset_info[file]['os_scenegraph_var'] + ')', file=fh)
+
+
+
+
 def make_asset(datainfo):
     """
     Generate the asset file for the sequence data.
@@ -330,12 +417,6 @@ def make_asset(datainfo):
         The asset file containing the OpenSpace configurations for the DNA sequence data.
     """
 
-    # We shift the stdout to our filehandle so that we don't have to keep putting
-    # the filehandle in every print statement.
-    # Save the original stdout so we can switch back later
-    original_stdout = sys.stdout
-
-
     # Define the main dict that will hold all the info needed per file
     # This is a nested dict with the format:
     #      { path: { root:  , filevar:  , os_variable:  , os_identifier:  , name:  } }
@@ -343,126 +424,46 @@ def make_asset(datainfo):
 
     # Gather info about the files
     # Get a listing of the speck files in the path, then set the dict
-    # values based on the filename.
-    path = Path.cwd() / datainfo['dir'] / datainfo['catalog_directory'] / common.SEQUENCE_DIRECTORY
-    files = sorted(path.glob('*.speck'))
+    # values based on the filename. scandir hands back the names straight
+    # from the directory listing, without building and stat-ing a Path per entry.
+    path = common.BASE_PATH / datainfo['dir'] / datainfo['catalog_directory'] / common.SEQUENCE_DIRECTORY
+    with os.scandir(path) as entries:
+        files = sorted(entry.name for entry in entries if entry.name.endswith('.speck'))
 
 
-    for path in files:
+    for file in files:
         
-        file = path.name
+        stem = file.removesuffix('.speck')
 
         # Set the nested dict
         asset_info[file] = {}
 
-        asset_info[file]['speck_file'] = path.name
+        asset_info[file]['speck_file'] = file
         #print(asset_info[file]['speck_file'], path, path.name)
         asset_info[file]['speck_var'] = common.file_variable_generator(asset_info[file]['speck_file'])
 
-        asset_info[file]['label_file'] = path.stem + '.label'
+        asset_info[file]['label_file'] = stem + '.label'
         asset_info[file]['label_var'] = common.file_variable_generator(asset_info[file]['label_file'])
 
-        asset_info[file]['cmap_file'] = path.stem + '_taxon.cmap'
+        asset_info[file]['cmap_file'] = stem + '_taxon.cmap'
         asset_info[file]['cmap_var'] = common.file_variable_generator(asset_info[file]['cmap_file'])
         
         asset_info[file]['asset_rel_path'] = common.SEQUENCE_DIRECTORY
 
-        asset_info[file]['os_scenegraph_var'] = datainfo['dir'] + '_' + datainfo['catalog_directory'] + '_' + path.stem
-        asset_info[file]['os_identifier_var'] = datainfo['dir'] + '_' + datainfo['catalog_directory'] + '_' + path.stem
+        asset_info[file]['os_scenegraph_var'] = datainfo['dir'] + '_' + datainfo['catalog_directory'] + '_' + stem
+        asset_info[file]['os_identifier_var'] = datainfo['dir'] + '_' + datainfo['catalog_directory'] + '_' + stem
 
-        asset_info[file]['gui_name'] = 'DNA ' + path.stem.replace('_', ' ').title()
+        asset_info[file]['gui_name'] = 'DNA ' + stem.replace('_', ' ').title()
         asset_info[file]['gui_path'] = '/' + datainfo['sub_project'] + '/' + datainfo['catalog_directory']
 
 
 
-    # Open the file to write to
+    # Open the file and write the asset
     outfile = common.SEQUENCE_DIRECTORY + '.asset'
-    outpath = Path.cwd() / datainfo['dir'] / datainfo['catalog_directory'] / outfile
-    with open(outpath, 'wt') as asset:
-
-        # Switch stdout to the file
-        sys.stdout = asset
-
-
-        print('-- ' + datainfo['project'] + ' / ' + datainfo['data_group_title'])
-        print("-- This file is auto-generated in the " + make_asset.__name__ + "() function inside " + Path(__file__).name)
-        print('-- Author: Brian Abbott <abbott@amnh.org>')
-        print()
-
-
-        for file in asset_info:
-            print('local ' + asset_info[file]['speck_var'] + ' = asset.resource("' + asset_info[file]['asset_rel_path'] + '/' + asset_info[file]['speck_file'] + '")')
-
-            #print('local ' + asset_info[file]['label_var'] + ' = asset.resource("' + asset_info[file]['asset_rel_path'] + '/' + asset_info[file]['label_file'] + '")')
-
-            print('local ' + asset_info[file]['cmap_var'] + ' = asset.resource("' + asset_info[file]['asset_rel_path'] + '/' + asset_info[file]['cmap_file'] + '")')
-        
-            #print('local color_file = asset.resource("' + asset_info[file]['cmap_file'] + '")')
-
-
-        print('-- Set some parameters for OpenSpace settings')
-        print('local scale_factor = ' + common.POINT_SCALE_FACTOR)
-        print('local scale_exponent = ' + common.POINT_SCALE_EXPONENT)
-        print('local text_size = ' + common.TEXT_SIZE)
-        print('local text_min_size = ' + common.TEXT_MIN_SIZE)
-        print('local text_max_size = ' + common.TEXT_MAX_SIZE)
-        print()
-
-
-
-        for file in asset_info:
-
-            print('local ' + asset_info[file]['os_scenegraph_var'] + ' = {')
-            print('    Identifier = "' + asset_info[file]['os_identifier_var'] + '",')
-            print('    Renderable = {')
-            print('        UseCaching = false,')
-            print('        Type = "RenderablePointCloud",')
-            print('         Coloring = {')
-            print('            FixedColor = { 0.8, 0.8, 0.8 }')
-            print('        },')
-            print('        ColorMap = ' + asset_info[file]['cmap_var'] + ',')
-            print('        ColorOption = { "lineage_30_code", "taxon_code" },')
-            print('        ColorRange = { {30001, 30025}, {1, 322} },')
-            print('        Opacity = 1.0,')
-            print('        SizeSettings = { ScaleExponent = scale_exponent, ScaleFactor = scale_factor },')
-            print('        File = ' + asset_info[file]['speck_var'] + ',')
-            print('        DrawLabels = false,')
-            print('        Unit = "Km",')
-            print('        BillboardMinMaxSize = { 0.0, 25.0 },')
-            print('        EnablePixelSizeControl = true,')
-            print('        EnableLabelFading = false,')
-            print('        Enabled = false')
-            print('    },')
-            print('    GUI = {')
-            print('        Name = "' + asset_info[file]['gui_name'] + '",')
-            print('        Path = "' + asset_info[file]['gui_path'] + '",')
-            print('    }')
-            print('}')
-            print()
-
-
-
-        print('asset.onInitialize(function()')
-        for file in asset_info:
-            print('    openspace.addSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')')
-
-        print('end)')
-        print()
-
-
-        print('asset.onDeinitialize(function()')
-        for file in asset_info:
-            print('    openspace.removeSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')')
-        
-        print('end)')
-        print()
-
-
-        for file in asset_info:
-            print('asset.export(' + asset_info[file]['os_scenegraph_var'] + ')')
+    outpath = common.BASE_PATH / datainfo['dir'] / datainfo['catalog_directory'] / outfile
+    with open(outpath, 'wt', buffering=1<<20) as asset:
+        _emit_asset(asset_info, datainfo, asset)
 
-    # Switch the stdout back to normal stdout (screen)
-    sys.stdout = original_stdout
 
  
     # Report to stdout
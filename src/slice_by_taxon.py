@@ -91,10 +91,6 @@ def make_asset(datainfo):
         The OpenSpace-ready asset file for the taxon-specific files.
     """
 
-    # We shift the stdout to our filehandle so that we don't have to keep putting
-    # the filehandle in every print statement.
-    # Save the original stdout so we can switch back later
-    original_stdout = sys.stdout
 
 
     # Define the main dict that will hold all the info needed per file
@@ -167,81 +163,72 @@ def make_asset(datainfo):
     outpath = Path.cwd() / datainfo['dir'] / datainfo['catalog_directory'] / outfile
     with open(outpath, 'wt') as out_asset:
 
-        # Switch stdout to the file
-        sys.stdout = out_asset
 
 
-        print('-- ' + datainfo['project'] + ' / ' + datainfo['data_group_title'])
-        print("-- This file is auto-generated in the " + make_asset.__name__ + "() function inside " + Path(__file__).name)
-        print('-- Author: Brian Abbott <abbott@amnh.org>')
-        print()
+        print('-- ' + datainfo['project'] + ' / ' + datainfo['data_group_title'], file=out_asset)
+        print("-- This file is auto-generated in the " + make_asset.__name__ + "() function inside " + Path(__file__).name, file=out_asset)
+        print('-- Author: Brian Abbott <abbott@amnh.org>', file=out_asset)
+        print(file=out_asset)
 
 
-        print('-- Set file paths')
+        print('-- Set file paths', file=out_asset)
         for file in asset_info:
-            print('local ' + asset_info[file]['speck_var'] + ' = asset.resource("' + asset_info[file]['asset_rel_path'] + '/' + asset_info[file]['speck_file'] + '")')
+            print('local ' + asset_info[file]['speck_var'] + ' = asset.resource("' + asset_info[file]['asset_rel_path'] + '/' + asset_info[file]['speck_file'] + '")', file=out_asset)
 
-        print()
+        print(file=out_asset)
 
-        print('-- Set some parameters for OpenSpace settings')
-        print('local scale_factor = ' + common.POINT_SCALE_FACTOR)
-        print('local scale_exponent = ' + common.POINT_SCALE_EXPONENT)
-        print('local text_size = ' + common.TEXT_SIZE)
-        print('local text_min_size = ' + common.TEXT_MIN_SIZE)
-        print('local text_max_size = ' + common.TEXT_MAX_SIZE)
-        print()
+        out_asset.write(common.ASSET_SETTINGS)
+        print(file=out_asset)
 
 
         for file in asset_info:
 
-            print('local ' + asset_info[file]['os_scenegraph_var'] + ' = {')
-            print('    Identifier = "' + asset_info[file]['os_identifier_var'] + '",')
-            print('    Renderable = {')
-            print('        UseCaching = false,')
-            print('        Type = "RenderablePointCloud",')
-            print('        Coloring = { FixedColor = {' + asset_info[file]['rgb'] + ' }, },\t-- ' + asset_info[file]['color_name'])
-            print('        Opacity = 1.0,')
-            print('        SizeSettings = { ScaleExponent = scale_exponent, ScaleFactor = scale_factor },')
-            print('        File = ' + asset_info[file]['speck_var'] + ',')
-            print('        DrawLabels = false,')
-            print('        Unit = "Km",')
-            print('        BillboardMinMaxSize = { 0.0, 25.0 },')
-            print('        EnablePixelSizeControl = true,')
-            print('        EnableLabelFading = false,')
-            print('        Enabled = false')
-            print('    },')
-            print('    GUI = {')
-            print('        Name = "' + asset_info[file]['gui_name'] + '",')
-            print('        Path = "' + asset_info[file]['gui_path'] + '",')
-            print('    }')
-            print('}')
-            print()
-
-
-
-        print('asset.onInitialize(function()')
+            print('local ' + asset_info[file]['os_scenegraph_var'] + ' = {', file=out_asset)
+            print('    Identifier = "' + asset_info[file]['os_identifier_var'] + '",', file=out_asset)
+            print('    Renderable = {', file=out_asset)
+            print('        UseCaching = false,', file=out_asset)
+            print('        Type = "RenderablePointCloud",', file=out_asset)
+            print('        Coloring = { FixedColor = {' + asset_info[file]['rgb'] + ' }, },\t-- ' + asset_info[file]['color_name'], file=out_asset)
+            print('        Opacity = 1.0,', file=out_asset)
+            print('        SizeSettings = { ScaleExponent = scale_exponent, ScaleFactor = scale_factor },', file=out_asset)
+            print('        File = ' + asset_info[file]['speck_var'] + ',', file=out_asset)
+            print('        DrawLabels = false,', file=out_asset)
+            print('        Unit = "Km",', file=out_asset)
+            print('        BillboardMinMaxSize = { 0.0, 25.0 },', file=out_asset)
+            print('        EnablePixelSizeControl = true,', file=out_asset)
+            print('        EnableLabelFading = false,', file=out_asset)
+            print('        Enabled = false', file=out_asset)
+            print('    },', file=out_asset)
+            print('    GUI = {', file=out_asset)
+            print('        Name = "' + asset_info[file]['gui_name'] + '",', file=out_asset)
+            print('        Path = "' + asset_info[file]['gui_path'] + '",', file=out_asset)
+            print('    }', file=out_asset)
+            print('}', file=out_asset)
+            print(file=out_asset)
+
+
+
+        print('asset.onInitialize(function()', file=out_asset)
         for file in asset_info:
-            print('    openspace.addSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')')
+            print('    openspace.addSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')', file=out_asset)
 
-        print('end)')
-        print()
+        print('end)', file=out_asset)
+        print(file=out_asset)
 
 
-        print('asset.onDeinitialize(function()')
+        print('asset.onDeinitialize(function()', file=out_asset)
         for file in asset_info:
-            print('    openspace.removeSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')')
+            print('    openspace.removeSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')', file=out_asset)
         
-        print('end)')
-        print()
+        print('end)', file=out_asset)
+        print(file=out_asset)
 
 
         for file in asset_info:
-            print('asset.export(' + asset_info[file]['os_scenegraph_var'] + ')')
+            print('asset.export(' + asset_info[file]['os_scenegraph_var'] + ')', file=out_asset)
 
-        print()
+        print(file=out_asset)
 
-    # Switch the stdout back to normal stdout (screen)
-    sys.stdout = original_stdout
 
     # Report to stdout
     common.out_file_message(outpath)
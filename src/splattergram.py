@@ -8,7 +8,6 @@ Consensus species is an average point that represents an entire species' data, s
 This module consists of a data processing function and an asset file creation file.
 '''
 
-import sys
 import pandas as pd
 from pathlib import Path
 
@@ -126,10 +125,6 @@ class splattergram:
 
     def make_asset(self, datainfo):
 
-        # We shift the stdout to our filehandle so that we don't have to keep putting
-        # the filehandle in every print statement.
-        # Save the original stdout so we can switch back later
-        original_stdout = sys.stdout
 
 
 
@@ -168,79 +163,70 @@ class splattergram:
         outpath = Path.cwd() / datainfo['dir'] / datainfo['catalog_directory'] / outfile
         with open(outpath, 'wt') as asset:
 
-            # Switch stdout to the file
-            sys.stdout = asset
 
-            print('-- ' + datainfo['project'] + ' / ' + datainfo['data_group_title'])
-            print("-- This file is auto-generated in the " + make_asset.__name__ + "() function inside " + Path(__file__).name)
-            print('-- Author: Brian Abbott <abbott@amnh.org>')
-            print()
+            print('-- ' + datainfo['project'] + ' / ' + datainfo['data_group_title'], file=asset)
+            print("-- This file is auto-generated in the " + make_asset.__name__ + "() function inside " + Path(__file__).name, file=asset)
+            print('-- Author: Brian Abbott <abbott@amnh.org>', file=asset)
+            print(file=asset)
 
             for file in asset_info:
-                print('local ' + asset_info[file]['csv_var'] + ' = asset.resource("' + asset_info[file]['asset_rel_path'] + '/' + asset_info[file]['csv_file'] + '")')
+                print('local ' + asset_info[file]['csv_var'] + ' = asset.resource("' + asset_info[file]['asset_rel_path'] + '/' + asset_info[file]['csv_file'] + '")', file=asset)
 
-            print('-- Set some parameters for OpenSpace settings')
-            print('local scale_factor = ' + common.POINT_SCALE_FACTOR)
-            print('local scale_exponent = ' + common.POINT_SCALE_EXPONENT)
-            print('local text_size = ' + common.TEXT_SIZE)
-            print('local text_min_size = ' + common.TEXT_MIN_SIZE)
-            print('local text_max_size = ' + common.TEXT_MAX_SIZE)
-            print()
+            asset.write(common.ASSET_SETTINGS)
+            print(file=asset)
 
             for file in asset_info:
 
-                print('local ' + asset_info[file]['os_scenegraph_var'] + ' = {')
-                print('    Identifier = "' + asset_info[file]['os_identifier_var'] + '",')
-                print('    Parent = "Earth",')
-                print('    Renderable = {')
-                print('        UseCaching = false,')
-                print('        Type = "RenderablePointCloud",')
-                print('         Coloring = {')
-                print('            FixedColor = { 0.8, 0.8, 0.8 }')
-                print('        },')
-                print('        Opacity = 1.0,')
-                print('        SizeSettings = { ScaleFactor = scale_factor, ScaleExponent = scale_exponent },')
-                print('        File = ' + asset_info[file]['csv_var'] + ',')
-                print('        DataMapping = { Name="taxon"},')
-                print('        Labels = { Enabled = false, Size = text_size  },')
-                print('        --FadeLabelDistances = { 0.0, 0.5 },')
-                print('        --FadeLabelWidths = { 0.001, 0.5 },')
-                print('        Unit = "Km",')
-                print('        BillboardMinMaxSize = { 0.0, 25.0 },')
-                print('        EnablePixelSizeControl = true,')
-                print('        EnableLabelFading = false,')
-                print('        Enabled = false')
-                print('    },')
-                print('    GUI = {')
-                print('        Name = "' + asset_info[file]['gui_name'] + '",')
-                print('        Path = "' + asset_info[file]['gui_path'] + '",')
-                print('    }')
-                print('}')
-                print()
-
-
-
-            print('asset.onInitialize(function()')
+                print('local ' + asset_info[file]['os_scenegraph_var'] + ' = {', file=asset)
+                print('    Identifier = "' + asset_info[file]['os_identifier_var'] + '",', file=asset)
+                print('    Parent = "Earth",', file=asset)
+                print('    Renderable = {', file=asset)
+                print('        UseCaching = false,', file=asset)
+                print('        Type = "RenderablePointCloud",', file=asset)
+                print('         Coloring = {', file=asset)
+                print('            FixedColor = { 0.8, 0.8, 0.8 }', file=asset)
+                print('        },', file=asset)
+                print('        Opacity = 1.0,', file=asset)
+                print('        SizeSettings = { ScaleFactor = scale_factor, ScaleExponent = scale_exponent },', file=asset)
+                print('        File = ' + asset_info[file]['csv_var'] + ',', file=asset)
+                print('        DataMapping = { Name="taxon"},', file=asset)
+                print('        Labels = { Enabled = false, Size = text_size  },', file=asset)
+                print('        --FadeLabelDistances = { 0.0, 0.5 },', file=asset)
+                print('        --FadeLabelWidths = { 0.001, 0.5 },', file=asset)
+                print('        Unit = "Km",', file=asset)
+                print('        BillboardMinMaxSize = { 0.0, 25.0 },', file=asset)
+                print('        EnablePixelSizeControl = true,', file=asset)
+                print('        EnableLabelFading = false,', file=asset)
+                print('        Enabled = false', file=asset)
+                print('    },', file=asset)
+                print('    GUI = {', file=asset)
+                print('        Name = "' + asset_info[file]['gui_name'] + '",', file=asset)
+                print('        Path = "' + asset_info[file]['gui_path'] + '",', file=asset)
+                print('    }', file=asset)
+                print('}', file=asset)
+                print(file=asset)
+
+
+
+            print('asset.onInitialize(function()', file=asset)
             for file in asset_info:
-                print('    openspace.addSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')')
+                print('    openspace.addSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')', file=asset)
 
-            print('end)')
-            print()
+            print('end)', file=asset)
+            print(file=asset)
 
 
-            print('asset.onDeinitialize(function()')
+            print('asset.onDeinitialize(function()', file=asset)
             for file in asset_info:
-                print('    openspace.removeSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')')
+                print('    openspace.removeSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')', file=asset)
             
-            print('end)')
-            print()
+            print('end)', file=asset)
+            print(file=asset)
 
 
             for file in asset_info:
-                print('asset.export(' + asset_info[file]['os_scenegraph_var'] + ')')
+                print('asset.export(' + asset_info[file]['os_scenegraph_var'] + ')', file=asset)
 
-        # Switch the stdout back to normal stdout (screen)
-        sys.stdout = original_stdout
 
     
         # Report to stdout
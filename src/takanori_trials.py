@@ -133,10 +133,6 @@ def make_asset(datainfo):
         takanori.asset
     '''
 
-    # We shift the stdout to our filehandle so that we don't have to keep putting
-    # the filehandle in every print statement.
-    # Save the original stdout so we can switch back later
-    original_stdout = sys.stdout
 
 
     # Define the main dict that will hold all the info needed per file
@@ -213,88 +209,79 @@ def make_asset(datainfo):
     outpath = Path.cwd() / datainfo['dir'] / common.TAKANORI_DIRECTORY / outfile
     with open(outpath, 'wt') as asset:
 
-        # Switch stdout to the file
-        sys.stdout = asset
 
 
-        print('-- ' + datainfo['project'] + ' / Primates: Takanori trial files')
-        print("-- This file is auto-generated in the " + make_asset.__name__ + "() function inside " + Path(__file__).name)
-        print('-- Author: Brian Abbott <abbott@amnh.org>')
-        print()
+        print('-- ' + datainfo['project'] + ' / Primates: Takanori trial files', file=asset)
+        print("-- This file is auto-generated in the " + make_asset.__name__ + "() function inside " + Path(__file__).name, file=asset)
+        print('-- Author: Brian Abbott <abbott@amnh.org>', file=asset)
+        print(file=asset)
 
 
         for file in asset_info:
             #print('local ' + asset_info[file]['speck_var'] + ' = asset.resource("' + asset_info[file]['asset_rel_path'] + '/' + asset_info[file]['speck_file'] + '")')
-            print('local ' + asset_info[file]['speck_var'] + ' = asset.resource("' + asset_info[file]['speck_file'] + '")')
+            print('local ' + asset_info[file]['speck_var'] + ' = asset.resource("' + asset_info[file]['speck_file'] + '")', file=asset)
 
             #print('local ' + asset_info[file]['label_var'] + ' = asset.resource("' + asset_info[file]['asset_rel_path'] + '/' + asset_info[file]['label_file'] + '")')
 
 
-        print('local ' + asset_info[file]['cmap_var'] + ' = asset.resource("' + asset_info[file]['cmap_file'] + '")')
+        print('local ' + asset_info[file]['cmap_var'] + ' = asset.resource("' + asset_info[file]['cmap_file'] + '")', file=asset)
 
-        print('-- Set some parameters for OpenSpace settings')
-        print('local scale_factor = ' + common.POINT_SCALE_FACTOR)
-        print('local scale_exponent = ' + common.POINT_SCALE_EXPONENT)
-        print('local text_size = ' + common.TEXT_SIZE)
-        print('local text_min_size = ' + common.TEXT_MIN_SIZE)
-        print('local text_max_size = ' + common.TEXT_MAX_SIZE)
-        print()
+        asset.write(common.ASSET_SETTINGS)
+        print(file=asset)
 
 
 
         for file in asset_info:
 
-            print('local ' + asset_info[file]['os_scenegraph_var'] + ' = {')
-            print('    Identifier = "' + asset_info[file]['os_identifier_var'] + '",')
-            print('    Renderable = {')
-            print('        UseCaching = false,')
-            print('        Type = "RenderablePointCloud",')
-            print('        Color = { 0.8, 0.8, 0.8 },')
-            print('        ColorMap = ' + asset_info[file]['cmap_var'] + ',')
-            print('        ColorOption = { "lineage_30_code" },')
-            print('        ColorRange = { {30001, 30025} },')
-            print('        Opacity = 1.0,')
-            print('        SizeSettings = { ScaleExponent = scale_exponent, ScaleFactor = scale_factor },')
-            print('        File = ' + asset_info[file]['speck_var'] + ',')
-            print('        DrawLabels = false,')
-            print('        Unit = "Km",')
-            print('        BillboardMinMaxSize = { 0.0, 25.0 },')
-            print('        EnablePixelSizeControl = true,')
-            print('        EnableLabelFading = false,')
-            print('        Enabled = false')
-            print('    },')
-            print('    GUI = {')
-            print('        Name = "' + asset_info[file]['gui_name'] + '",')
-            print('        Path = "' + asset_info[file]['gui_path'] + '",')
-            print('    }')
-            print('}')
-            print()
-
-
-
-        print('asset.onInitialize(function()')
+            print('local ' + asset_info[file]['os_scenegraph_var'] + ' = {', file=asset)
+            print('    Identifier = "' + asset_info[file]['os_identifier_var'] + '",', file=asset)
+            print('    Renderable = {', file=asset)
+            print('        UseCaching = false,', file=asset)
+            print('        Type = "RenderablePointCloud",', file=asset)
+            print('        Color = { 0.8, 0.8, 0.8 },', file=asset)
+            print('        ColorMap = ' + asset_info[file]['cmap_var'] + ',', file=asset)
+            print('        ColorOption = { "lineage_30_code" },', file=asset)
+            print('        ColorRange = { {30001, 30025} },', file=asset)
+            print('        Opacity = 1.0,', file=asset)
+            print('        SizeSettings = { ScaleExponent = scale_exponent, ScaleFactor = scale_factor },', file=asset)
+            print('        File = ' + asset_info[file]['speck_var'] + ',', file=asset)
+            print('        DrawLabels = false,', file=asset)
+            print('        Unit = "Km",', file=asset)
+            print('        BillboardMinMaxSize = { 0.0, 25.0 },', file=asset)
+            print('        EnablePixelSizeControl = true,', file=asset)
+            print('        EnableLabelFading = false,', file=asset)
+            print('        Enabled = false', file=asset)
+            print('    },', file=asset)
+            print('    GUI = {', file=asset)
+            print('        Name = "' + asset_info[file]['gui_name'] + '",', file=asset)
+            print('        Path = "' + asset_info[file]['gui_path'] + '",', file=asset)
+            print('    }', file=asset)
+            print('}', file=asset)
+            print(file=asset)
+
+
+
+        print('asset.onInitialize(function()', file=asset)
         for file in asset_info:
-            print('    openspace.addSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')')
+            print('    openspace.addSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')', file=asset)
 
-        print('end)')
-        print()
+        print('end)', file=asset)
+        print(file=asset)
 
 
-        print('asset.onDeinitialize(function()')
+        print('asset.onDeinitialize(function()', file=asset)
         for file in asset_info:
-            print('    openspace.removeSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')')
+            print('    openspace.removeSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')', file=asset)
         
-        print('end)')
-        print()
+        print('end)', file=asset)
+        print(file=asset)
 
 
         for file in asset_info:
-            print('asset.export(' + asset_info[file]['os_scenegraph_var'] + ')')
+            print('asset.export(' + asset_info[file]['os_scenegraph_var'] + ')', file=asset)
 
-        print()
+        print(file=asset)
 
-    # Switch the stdout back to normal stdout (screen)
-    sys.stdout = original_stdout
 
     # Report to stdout
     common.out_file_message(outpath)
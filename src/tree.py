@@ -475,10 +475,6 @@ class tree:
             datainfo['dir']_branches.asset
         '''
 
-        # We shift the stdout to our filehandle so that we don't have to keep putting
-        # the filehandle in every print statement.
-        # Save the original stdout so we can switch back later
-        original_stdout = sys.stdout
 
 
 
@@ -531,65 +527,61 @@ class tree:
         outpath = Path.cwd() / datainfo['dir'] / datainfo['tree_dir'] / outfile
         with open(outpath, 'wt') as asset:
 
-            # Switch stdout to the file
-            sys.stdout = asset
 
-            print('-- ' + datainfo['project'] + ' / ' + datainfo['data_group_title'])
-            print("-- This file is auto-generated in the " + self.make_asset_branches.__name__ + "() function inside " + Path(__file__).name)
-            print('-- Author: Brian Abbott <abbott@amnh.org>')
-            print()
+            print('-- ' + datainfo['project'] + ' / ' + datainfo['data_group_title'], file=asset)
+            print("-- This file is auto-generated in the " + self.make_asset_branches.__name__ + "() function inside " + Path(__file__).name, file=asset)
+            print('-- Author: Brian Abbott <abbott@amnh.org>', file=asset)
+            print(file=asset)
 
 
-            print('local ' + asset_info[file]['dat_var'] + ' = asset.resource("' + asset_info[file]['asset_rel_path'] + '/' + asset_info[file]['dat_file'] + '")')
+            print('local ' + asset_info[file]['dat_var'] + ' = asset.resource("' + asset_info[file]['asset_rel_path'] + '/' + asset_info[file]['dat_file'] + '")', file=asset)
 
             for file in asset_info:
-                print('local ' + asset_info[file]['speck_var'] + ' = asset.resource("' + asset_info[file]['asset_rel_path'] + '/' + asset_info[file]['speck_file'] + '")')
+                print('local ' + asset_info[file]['speck_var'] + ' = asset.resource("' + asset_info[file]['asset_rel_path'] + '/' + asset_info[file]['speck_file'] + '")', file=asset)
 
 
             for file in asset_info:
 
-                print('local ' + asset_info[file]['os_scenegraph_var'] + ' = {')
-                print('    Identifier = "' + asset_info[file]['os_identifier_var'] + '",')
-                print('    Renderable = {')
-                print('        UseCache = false,')
-                print('        Type = "RenderableConstellationLines",')
-                print('        Colors = { { 0.6, 0.4, 0.4 }, { 0.8, 0.0, 0.0 }, { 0.0, 0.3, 0.8 } },')
-                print('        Opacity = 0.7,')
-                print('        NamesFile = ' + asset_info[file]['dat_var'] + ',')
-                print('        File = ' + asset_info[file]['speck_var'] + ',')
-                print('        Unit = "Km",')
-                print('        Enabled = false')
-                print('    },')
-                print('    GUI = {')
-                print('        Name = "' + asset_info[file]['gui_name'] + '",')
-                print('        Path = "' + asset_info[file]['gui_path'] + '",')
-                print('    }')
-                print('}')
-                print()
-
-
-
-            print('asset.onInitialize(function()')
+                print('local ' + asset_info[file]['os_scenegraph_var'] + ' = {', file=asset)
+                print('    Identifier = "' + asset_info[file]['os_identifier_var'] + '",', file=asset)
+                print('    Renderable = {', file=asset)
+                print('        UseCache = false,', file=asset)
+                print('        Type = "RenderableConstellationLines",', file=asset)
+                print('        Colors = { { 0.6, 0.4, 0.4 }, { 0.8, 0.0, 0.0 }, { 0.0, 0.3, 0.8 } },', file=asset)
+                print('        Opacity = 0.7,', file=asset)
+                print('        NamesFile = ' + asset_info[file]['dat_var'] + ',', file=asset)
+                print('        File = ' + asset_info[file]['speck_var'] + ',', file=asset)
+                print('        Unit = "Km",', file=asset)
+                print('        Enabled = false', file=asset)
+                print('    },', file=asset)
+                print('    GUI = {', file=asset)
+                print('        Name = "' + asset_info[file]['gui_name'] + '",', file=asset)
+                print('        Path = "' + asset_info[file]['gui_path'] + '",', file=asset)
+                print('    }', file=asset)
+                print('}', file=asset)
+                print(file=asset)
+
+
+
+            print('asset.onInitialize(function()', file=asset)
             for file in asset_info:
-                print('    openspace.addSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')')
+                print('    openspace.addSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')', file=asset)
 
-            print('end)')
-            print()
+            print('end)', file=asset)
+            print(file=asset)
 
 
-            print('asset.onDeinitialize(function()')
+            print('asset.onDeinitialize(function()', file=asset)
             for file in asset_info:
-                print('    openspace.removeSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')')
+                print('    openspace.removeSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')', file=asset)
             
-            print('end)')
-            print()
+            print('end)', file=asset)
+            print(file=asset)
 
 
             for file in asset_info:
-                print('asset.export(' + asset_info[file]['os_scenegraph_var'] + ')')
+                print('asset.export(' + asset_info[file]['os_scenegraph_var'] + ')', file=asset)
 
-            # Switch the stdout back to normal stdout (screen)
-            sys.stdout = original_stdout
 
         
             # Report to stdout
@@ -630,10 +622,6 @@ class tree:
             xxxxxxx_'taxa'.asset
         '''
 
-        # We shift the stdout to our filehandle so that we don't have to keep putting
-        # the filehandle in every print statement.
-        # Save the original stdout so we can switch back later
-        original_stdout = sys.stdout
 
         # Define the main dict that will hold all the info needed per file
         # This is a nested dict with the format:
@@ -692,16 +680,14 @@ class tree:
         outpath = Path.cwd() / datainfo['dir'] / datainfo['tree_dir'] / outfile
         with open(outpath, 'wt') as asset:
 
-            # Switch stdout to the file
-            sys.stdout = asset
 
-            print('-- ' + datainfo['project'] + ' / ' + datainfo['data_group_title'])
-            print("-- This file is auto-generated in the " + self.make_asset_nodes.__name__ + "() function inside " + Path(__file__).name)
-            print('-- Author: Brian Abbott <abbott@amnh.org>')
-            print()
+            print('-- ' + datainfo['project'] + ' / ' + datainfo['data_group_title'], file=asset)
+            print("-- This file is auto-generated in the " + self.make_asset_nodes.__name__ + "() function inside " + Path(__file__).name, file=asset)
+            print('-- Author: Brian Abbott <abbott@amnh.org>', file=asset)
+            print(file=asset)
 
 
-            print('local ' + asset_info[file]['dat_var'] + ' = asset.resource("' + asset_info[file]['asset_rel_path'] + '/' + asset_info[file]['dat_file'] + '")')
+            print('local ' + asset_info[file]['dat_var'] + ' = asset.resource("' + asset_info[file]['asset_rel_path'] + '/' + asset_info[file]['dat_file'] + '")', file=asset)
 
             # Not every asset has a color map file. Make the path to it given the data
             # from the asset_info dict and check to see if it's there.
@@ -710,13 +696,13 @@ class tree:
             cmap_filename = asset_info[file]['cmap_file']
             use_colormap = False
             if Path(full_cmap_file_path).exists():
-                print(f'local {asset_info[file]["cmap_var"]} = asset.resource("./{cmap_filename}")')
+                print(f'local {asset_info[file]["cmap_var"]} = asset.resource("./{cmap_filename}")', file=asset)
                 use_colormap = True
 
             for file in asset_info:
-                print('local ' + asset_info[file]['csv_var'] + ' = asset.resource("' + asset_info[file]['asset_rel_path'] + '/' + asset_info[file]['csv_file'] + '")')
+                print('local ' + asset_info[file]['csv_var'] + ' = asset.resource("' + asset_info[file]['asset_rel_path'] + '/' + asset_info[file]['csv_file'] + '")', file=asset)
 
-            print('-- Set some parameters for OpenSpace settings')
+            print('-- Set some parameters for OpenSpace settings', file=asset)
             # if datainfo has point_scale_factor or scale exponent parameters set, use
             # those, otherwise use the defaults defined in common.py.
             scale_factor = common.POINT_SCALE_FACTOR
@@ -728,77 +714,75 @@ class tree:
                scale_exponent = datainfo['scale_exponent']
             else:
                 scale_exponent = common.POINT_SCALE_EXPONENT
-            print('local scale_factor = ' + str(scale_factor))
-            print('local scale_exponent = ' + str(scale_exponent))
-            print('local text_size = ' + common.TEXT_SIZE)
-            print('local text_min_size = ' + common.TEXT_MIN_SIZE)
-            print('local text_max_size = ' + common.TEXT_MAX_SIZE)
-            print()
+            print('local scale_factor = ' + str(scale_factor), file=asset)
+            print('local scale_exponent = ' + str(scale_exponent), file=asset)
+            print('local text_size = ' + common.TEXT_SIZE, file=asset)
+            print('local text_min_size = ' + common.TEXT_MIN_SIZE, file=asset)
+            print('local text_max_size = ' + common.TEXT_MAX_SIZE, file=asset)
+            print(file=asset)
 
             for file in asset_info:
 
-                print('local ' + asset_info[file]['os_scenegraph_var'] + ' = {')
-                print('    Identifier = "' + asset_info[file]['os_identifier_var'] + '",')
-                print('    Renderable = {')
-                print('        UseCaching = false,')
-                print('        Type = "RenderablePointCloud",')
-                print('         Coloring = {')
+                print('local ' + asset_info[file]['os_scenegraph_var'] + ' = {', file=asset)
+                print('    Identifier = "' + asset_info[file]['os_identifier_var'] + '",', file=asset)
+                print('    Renderable = {', file=asset)
+                print('        UseCaching = false,', file=asset)
+                print('        Type = "RenderablePointCloud",', file=asset)
+                print('         Coloring = {', file=asset)
                 #print('            FixedColor = { 0.8, 0.8, 0.8 }')
                 if (taxa == 'internal') or (use_colormap == False):
                     # Gotta fix this. The colors for the orders for the internal nodes and
                     # the leaves need to be the same, so we need to make this mapping once
                     # and then re-use it.
-                    print('            FixedColor = { 0.8, 0.8, 0.8 }')
+                    print('            FixedColor = { 0.8, 0.8, 0.8 }', file=asset)
                 else:
-                    print('            ColorMapping = { ')
-                    print('                File = ' + asset_info[file]['cmap_var'] + ',')
-                    print('                ParameterOptions = { { Key = "color" } }')
-                    print('            }')
-                print('        },')
-                print('        Opacity = 1.0,')
-                print('        SizeSettings = { ScaleFactor = scale_factor, ScaleExponent = scale_exponent },')
-                print('        File = ' + asset_info[file]['csv_var'] + ',')
-                print('        DataMapping = { Name="name"},')
-                print('        Labels = { Enabled = false, Size = text_size  },')
-                print('        --FadeLabelDistances = { 0.0, 0.5 },')
-                print('        --FadeLabelWidths = { 0.001, 0.5 },')
-                print('        Unit = "Km",')
-                print('        BillboardMinMaxSize = { 0.0, 25.0 },')
-                print('        EnablePixelSizeControl = true,')
-                print('        EnableLabelFading = false,')
-                print('        Enabled = false')
-                print('    },')
-                print('    GUI = {')
-                print('        Name = "' + asset_info[file]['gui_name'] + '",')
-                print('        Path = "' + asset_info[file]['gui_path'] + '",')
-                print('    }')
-                print('}')
-                print()
-
-
-
-            print('asset.onInitialize(function()')
+                    print('            ColorMapping = { ', file=asset)
+                    print('                File = ' + asset_info[file]['cmap_var'] + ',', file=asset)
+                    print('                ParameterOptions = { { Key = "color" } }', file=asset)
+                    print('            }', file=asset)
+                print('        },', file=asset)
+                print('        Opacity = 1.0,', file=asset)
+                print('        SizeSettings = { ScaleFactor = scale_factor, ScaleExponent = scale_exponent },', file=asset)
+                print('        File = ' + asset_info[file]['csv_var'] + ',', file=asset)
+                print('        DataMapping = { Name="name"},', file=asset)
+                print('        Labels = { Enabled = false, Size = text_size  },', file=asset)
+                print('        --FadeLabelDistances = { 0.0, 0.5 },', file=asset)
+                print('        --FadeLabelWidths = { 0.001, 0.5 },', file=asset)
+                print('        Unit = "Km",', file=asset)
+                print('        BillboardMinMaxSize = { 0.0, 25.0 },', file=asset)
+                print('        EnablePixelSizeControl = true,', file=asset)
+                print('        EnableLabelFading = false,', file=asset)
+                print('        Enabled = false', file=asset)
+                print('    },', file=asset)
+                print('    GUI = {', file=asset)
+                print('        Name = "' + asset_info[file]['gui_name'] + '",', file=asset)
+                print('        Path = "' + asset_info[file]['gui_path'] + '",', file=asset)
+                print('    }', file=asset)
+                print('}', file=asset)
+                print(file=asset)
+
+
+
+            print('asset.onInitialize(function()', file=asset)
             for file in asset_info:
-                print('    openspace.addSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')')
+                print('    openspace.addSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')', file=asset)
 
-            print('end)')
-            print()
+            print('end)', file=asset)
+            print(file=asset)
 
 
-            print('asset.onDeinitialize(function()')
+            print('asset.onDeinitialize(function()', file=asset)
             for file in asset_info:
-                print('    openspace.removeSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')')
+                print('    openspace.removeSceneGraphNode(' + asset_info[file]['os_scenegraph_var'] + ')', file=asset)
             
-            print('end)')
-            print()
+            print('end)', file=asset)
+            print(file=asset)
 
 
             for file in asset_info:
-                print('asset.export(' + asset_info[file]['os_scenegraph_var'] + ')')
+                print('asset.export(' + asset_info[file]['os_scenegraph_var'] + ')', file=asset)
 
 
-            # Switch the stdout back to normal stdout (screen)
-            sys.stdout = original_stdout
 
         
             # Report to stdout